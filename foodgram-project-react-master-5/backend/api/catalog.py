@@ -0,0 +1,171 @@
+import gzip
+from threading import Lock, local
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from api.renderers import dumps
+from recipes.models import DeletedIngredient, Ingredient, Tag
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class TagCatalog:
+    """
+    Теги в памяти процесса.
+    Таблица тегов маленькая и почти не меняется, поэтому она читается
+    целиком и перечитывается при смене состояния: наибольшей метки
+    Tag.version и числа записей. Состояние берётся из самих данных, как у
+    IngredientSnapshot, и сверяется с БД не чаще раза за запрос: после
+    expire, которую вызывают начало запроса и запись в Tag этого процесса.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.local = local()
+        self.version = None
+        self.state = ((), {}, {}, {})
+
+    def expire(self, **kwargs):
+        """Следующее обращение в этом потоке сверит состояние с БД."""
+        self.local.checked = False
+
+    @staticmethod
+    def get_totals():
+        totals = Tag.objects.aggregate(
+            version=Max('version'), count=Count('id')
+        )
+        return totals['version'] or 0, totals['count']
+
+    def refresh(self):
+        if getattr(self.local, 'checked', False):
+            return self.state
+        version = self.get_totals()
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.state = self.load()
+                    self.version = version
+        self.local.checked = True
+        return self.state
+
+    @staticmethod
+    def load():
+        from api.serializers.recipes import TagSerializer
+
+        tags = tuple(Tag.objects.all())
+        by_id = {tag.id: tag for tag in tags}
+        by_slug = {tag.slug: tag for tag in tags}
+        data = {tag.id: TagSerializer(tag).data for tag in tags}
+        return tags, by_id, by_slug, data
+
+    def all(self):
+        """Все теги в порядке Tag.Meta.ordering."""
+        return self.refresh()[0]
+
+    def get(self, pk):
+        return self.refresh()[1].get(pk)
+
+    def get_by_slug(self, slug):
+        return self.refresh()[2].get(slug)
+
+    def serialize(self, tag_ids=None):
+        """Выдача TagSerializer для тегов в порядке каталога."""
+        tags, _, _, data = self.refresh()
+        if tag_ids is None:
+            return [data[tag.id] for tag in tags]
+        tag_ids = set(tag_ids)
+        return [data[tag.id] for tag in tags if tag.id in tag_ids]
+
+
+tag_catalog = TagCatalog()
+
+
+def tag_slug_choices():
+    """Варианты слагов для фильтров, без запроса к БД."""
+    return [(tag.slug, tag.name) for tag in tag_catalog.all()]
+
+
+class IngredientSnapshot:
+    """
+    Весь каталог ингредиентов одним готовым документом.
+    Документ и его сжатые gzip и brotli варианты строятся один раз на
+    состояние таблицы и делятся между процессами через кэш Django.
+    Состояние — наибольшая метка изменения или удаления (Ingredient.version,
+    DeletedIngredient.version) и число записей: оно берётся из самих
+    данных, поэтому загрузка из команды или другого процесса видна сразу,
+    даже без общего кэша. От метки version клиент запрашивает изменения
+    и удаления через since_version.
+    """
+
+    cache_key = 'ingredient-snapshot:{}-{}'
+    fields = ('id', 'name', 'measurement_unit')
+
+    def __init__(self):
+        self.lock = Lock()
+        self.state = None
+        self.variants = None
+
+    @staticmethod
+    def get_totals():
+        totals = Ingredient.objects.aggregate(
+            version=Max('version'), count=Count('id')
+        )
+        deleted = DeletedIngredient.objects.aggregate(
+            version=Max('version')
+        )
+        return (
+            max(totals['version'] or 0, deleted['version'] or 0),
+            totals['count'],
+        )
+
+    def get(self):
+        """Метка состояния каталога и варианты документа по кодировкам."""
+        state = self.get_totals()
+        if state != self.state:
+            with self.lock:
+                if state != self.state:
+                    key = self.cache_key.format(*state)
+                    variants = cache.get(key)
+                    if variants is None:
+                        variants = self.build(state[0])
+                        cache.set(key, variants, None)
+                    self.variants = variants
+                    self.state = state
+        return '{}-{}'.format(*state), self.variants
+
+    def build(self, version):
+        rows = list(Ingredient.objects.values(*self.fields))
+        raw = dumps({
+            'version': version,
+            'count': len(rows),
+            'ingredients': rows,
+        })
+        variants = {'identity': raw, 'gzip': gzip.compress(raw, 9)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(raw, quality=11)
+        return variants
+
+    def changes(self, since_version):
+        """
+        Добавленные и изменённые после метки since_version ингредиенты
+        и id удалённых после неё в deleted.
+        """
+        changed = Ingredient.objects.filter(version__gt=since_version)
+        deleted = DeletedIngredient.objects.filter(
+            version__gt=since_version
+        ).exclude(ingredient_id__in=changed.values('id'))
+        version, count = self.get_totals()
+        return {
+            'version': version,
+            'since_version': since_version,
+            'count': count,
+            'ingredients': list(changed.values(*self.fields)),
+            'deleted': list(deleted.values_list('ingredient_id', flat=True)),
+        }
+
+
+ingredient_snapshot = IngredientSnapshot()
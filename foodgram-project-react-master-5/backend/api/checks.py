@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Счётчики версий (api.versions) должны быть общими для всех процессов,
+    иначе запись в одном воркере не сбрасывает кэши остальных.
+    """
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    message = 'Кэш по умолчанию у каждого процесса свой.'
+    hint = (
+        'Задайте общий кэш через CACHE_BACKEND и CACHE_LOCATION: '
+        'DatabaseCache, Redis или Memcached.'
+    )
+    if settings.DEBUG:
+        return [Warning(message, hint=hint, id='api.W001')]
+    return [Error(message, hint=hint, id='api.E001')]
+
+
+@register()
+def check_pdf_font(app_configs, **kwargs):
+    """Без шрифта выгрузка списка покупок в PDF отвечает ошибкой 500."""
+    path = settings.SHOPPING_LIST_PDF_FONT
+    if os.path.isfile(path):
+        return []
+    return [Warning(
+        f'Не найден шрифт для PDF: {path}.',
+        hint=(
+            'Установите fonts-dejavu-core или укажите шрифт TrueType '
+            'с кириллицей в SHOPPING_LIST_PDF_FONT.'
+        ),
+        id='api.W002',
+    )]
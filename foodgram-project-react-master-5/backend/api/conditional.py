@@ -0,0 +1,76 @@
+from hashlib import sha1
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+from api.versions import get_versions
+
+
+class NotModified(Exception):
+    """Прерывает обработку запроса готовым ответом 304."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    ETag для действий conditional_actions.
+    ETag считается по счётчикам версий из get_etag_versions, так что 304
+    отдаётся до выборки и сериализации данных. Пустой список версий (по
+    умолчанию — etag_versions) отключает проверку перед действием: тогда
+    действие может вызвать check_not_modified само, когда версии станут
+    известны, например после выборки страницы. Last-Modified не
+    отдаётся: секундной точности не хватает, чтобы различать записи.
+    """
+
+    conditional_actions = ('list', 'retrieve')
+    etag_versions = ()
+    etag = None
+
+    def get_etag_versions(self):
+        return list(self.etag_versions)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        versions = self.get_etag_versions()
+        if versions:
+            self.check_not_modified(versions)
+
+    def check_not_modified(self, versions):
+        """Прерывает действие ответом 304, если ETag клиента совпал."""
+        request = self.request
+        if request.method not in ('GET', 'HEAD'):
+            return
+        if self.action not in self.conditional_actions:
+            return
+        self.etag = self.get_etag(request, versions)
+        response = get_conditional_response(request, etag=self.etag)
+        if response is not None:
+            raise NotModified(response)
+
+    def get_etag(self, request, versions):
+        digest = sha1(repr((
+            self.basename,
+            self.action,
+            sorted(self.kwargs.items()),
+            request.build_absolute_uri(),
+            request.accepted_media_type,
+            request.user.id,
+            sorted(get_versions(versions).items()),
+        )).encode()).hexdigest()
+        return quote_etag(digest)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.etag and response.status_code in (200, 304):
+            response.headers.setdefault('ETag', self.etag)
+            patch_vary_headers(response, ('Authorization',))
+        return response
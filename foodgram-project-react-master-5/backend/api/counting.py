@@ -0,0 +1,65 @@
+import json
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from api.versions import get_versions
+
+EXACT = 'exact'
+CACHED = 'cached'
+ESTIMATED = 'estimated'
+
+
+class QuerysetCounter:
+    """
+    Подсчёт объектов для пагинации.
+    exact     — COUNT(*) на каждый запрос;
+    cached    — COUNT(*) кэшируется по тексту запроса и версиям данных;
+    estimated — как cached, но на больших выборках берётся оценка
+                планировщика (только PostgreSQL).
+    """
+
+    def __init__(self, versions=(), strategy=None, timeout=None,
+                 threshold=None):
+        self.versions = tuple(versions)
+        self.strategy = strategy or settings.PAGINATION_COUNT_STRATEGY
+        self.timeout = timeout or settings.PAGINATION_COUNT_CACHE_TIMEOUT
+        self.threshold = (
+            threshold or settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+        )
+
+    def count(self, queryset):
+        """Возвращает пару (количество, точное ли оно)."""
+        queryset = queryset.order_by()
+        if self.strategy == ESTIMATED:
+            estimate = self.estimate(queryset)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate, False
+        if self.strategy == EXACT or not self.versions:
+            return queryset.count(), True
+        key = self.get_cache_key(queryset)
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.timeout)
+        return count, True
+
+    def get_cache_key(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        versions = get_versions(self.versions)
+        digest = sha1(repr((sql, params, sorted(versions.items()))).encode())
+        return f'count:{digest.hexdigest()}'
+
+    def estimate(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
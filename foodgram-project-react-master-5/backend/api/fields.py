@@ -1,11 +1,10 @@
-import base64
-import imghdr
-import uuid
-
-import six
-from django.core.files.base import ContentFile
 from rest_framework import serializers
 
+from api.catalog import tag_catalog
+from api.uploads import ImageDecodeError, decode_image
+from recipes.models import Recipe
+from recipes.variants import get_variant_names
+
 
 class Base64ImageField(serializers.ImageField):
     """ Поле для обработки изображений в формате Base64. """
@@ -14,28 +13,54 @@ class Base64ImageField(serializers.ImageField):
         if data == '':
             return None
         
-        if isinstance(data, six.string_types):
-            if 'base64,' in data:
-                data = data.split('base64,')[1]
-            
+        if isinstance(data, str):
             try:
-                decoded_file = base64.b64decode(data)
-            except TypeError:
-                self.fail('invalid_image')
-            
-            file_name = str(uuid.uuid4())[:12]
-            file_extension = self.get_file_extension(file_name, decoded_file)
-            complete_file_name = file_name + "." + file_extension
-            
-            data = ContentFile(decoded_file, name=complete_file_name)
+                data = decode_image(data)
+            except ImageDecodeError as error:
+                raise serializers.ValidationError(str(error))
         
         return super(Base64ImageField, self).to_internal_value(data)
-    
-    def get_file_extension(self, file_name, decoded_file):
-        extension = imghdr.what(file_name, decoded_file)
-        if extension is None:
-            raise serializers.ValidationError(
-                "Не удалось определить формат файла."
-            )
-        extension = "jpg" if extension == "jpeg" else extension
-        return extension
+
+
+def image_variant_urls(name, request=None):
+    """Адреса копий картинки name: {формат: {ширина: URL}}."""
+    if not name:
+        return None
+    storage = Recipe._meta.get_field('image').storage
+    urls = {}
+    for extension, variants in get_variant_names(name).items():
+        urls[extension] = {}
+        for width, variant in variants.items():
+            url = storage.url(variant)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[extension][str(width)] = url
+    return urls
+
+
+class ImageVariantsField(serializers.Field):
+    """ Копии картинки разной ширины в WebP и JPEG. """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'image')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return image_variant_urls(value.name, self.context.get('request'))
+
+
+class CatalogTagField(serializers.PrimaryKeyRelatedField):
+    """ Тег по id, проверяется по каталогу тегов без запроса к БД. """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        tag = tag_catalog.get(pk)
+        if tag is None:
+            self.fail('does_not_exist', pk_value=data)
+        return tag
@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, OuterRef
 from django_filters import NumberFilter
 from django_filters import rest_framework as filters
 from django_filters.rest_framework import FilterSet
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe
+from api.catalog import tag_catalog, tag_slug_choices
+from recipes.models import Recipe, RecipeTags
+from recipes.search import search_recipes
 
 User = get_user_model()
 
@@ -22,10 +25,47 @@ class IngredientsFilter(SearchFilter):
 class RecipesFilterSet(FilterSet):
     """Фильтр рецептов по тегам, авторам, избранному, подпискам"""
 
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_slug_choices, method='filter_tags'
+    )
+    tags_mode = filters.ChoiceFilter(
+        choices=(('any', 'Любой из тегов'), ('all', 'Все теги')),
+        method='filter_tags_mode',
+    )
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
     is_favorited = NumberFilter(method='filter_is_favorited')
     is_in_shopping_cart = NumberFilter(method='filter_shopping_cart')
+    search = filters.CharFilter(method='filter_search')
+
+    def filter_tags(self, queryset, name, slugs):
+        """
+        Фильтрация по тегам: слаги сверяются с каталогом, рецепты
+        отбираются подзапросом по связям без JOIN, поэтому не дублируются.
+        tags_mode=all оставляет рецепты со всеми тегами, по умолчанию
+        достаточно любого.
+        """
+        slugs = set(slugs)
+        tags = (tag_catalog.get_by_slug(slug) for slug in slugs)
+        links = RecipeTags.objects.filter(
+            tags_id__in=[tag.id for tag in tags if tag is not None]
+        )
+        if self.form.cleaned_data.get('tags_mode') == 'all':
+            return queryset.filter(id__in=links.values('recipe_id').annotate(
+                matched=Count('tags_id')
+            ).filter(matched=len(slugs)).values('recipe_id'))
+        return queryset.filter(Exists(links.filter(recipe_id=OuterRef('pk'))))
+
+    def filter_tags_mode(self, queryset, name, mode):
+        """Режим применяется в filter_tags."""
+        return queryset
+
+    def filter_search(self, queryset, name, query):
+        """
+        Полнотекстовый поиск по названию и описанию с учётом словоформ,
+        более релевантные рецепты идут первыми. Такую выдачу листают
+        по page, с cursor запрос отклоняется.
+        """
+        return search_recipes(queryset, query)
 
     def filter_is_favorited(self, queryset, is_favorited, number):
         """Фильтрация по избранному"""
@@ -43,4 +83,7 @@ class RecipesFilterSet(FilterSet):
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'tags_mode', 'author', 'is_favorited',
+            'is_in_shopping_cart', 'search',
+        )
@@ -0,0 +1,65 @@
+import base64
+import math
+import time
+import tracemalloc
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+from rest_framework import serializers
+
+from api.uploads import decode_image
+
+
+def make_payload(megabytes):
+    """Data URI с PNG из шума, который почти не сжимается."""
+    side = int(math.sqrt(megabytes * 1024 * 1024 / 3))
+    buffer = BytesIO()
+    Image.effect_noise((side, side), 64).convert('RGB').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+def decode_whole(data):
+    """Прежний способ: split, b64decode целиком и ContentFile."""
+    decoded = base64.b64decode(data.split('base64,')[1])
+    return ContentFile(decoded, name='image.png')
+
+
+def decode_streaming(data):
+    return decode_image(data, max_size=len(data), max_pixels=10 ** 9)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пиковая память и время разбора картинки из base64: '
+        'декодирование целиком против потокового.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1, 5, 10, 20],
+            help='Размеры картинок в мегабайтах.',
+        )
+
+    def handle(self, *args, **options):
+        field = serializers.ImageField()
+        for megabytes in options['sizes']:
+            data = make_payload(megabytes)
+            for title, decode in (
+                ('целиком', decode_whole),
+                ('потоком', decode_streaming),
+            ):
+                tracemalloc.start()
+                started = time.perf_counter()
+                upload = field.to_internal_value(decode(data))
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                upload.close()
+                self.stdout.write(
+                    f'{len(data) / 1024 / 1024:.1f} МБ base64, {title}: '
+                    f'пик {peak / 1024 / 1024:.1f} МБ, '
+                    f'{elapsed * 1000:.0f} мс'
+                )
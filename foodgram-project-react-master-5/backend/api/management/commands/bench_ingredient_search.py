@@ -0,0 +1,103 @@
+import json
+import os
+from random import Random
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.search.ingredients import IngredientIndex, fold, word_trigrams
+
+
+class Command(BaseCommand):
+    help = (
+        'Время поиска ингредиента на каждое нажатие клавиши: индекс '
+        'в памяти против линейного просмотра, как при icontains, '
+        'в том числе для запросов с опечатками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=20)
+        parser.add_argument('--queries', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with open(os.path.join(settings.BASE_DIR, 'data', 'ingredients.json'),
+                  encoding='utf-8') as file:
+            seed = json.load(file)
+        rows = [
+            {
+                'id': copy * len(seed) + pk,
+                'name': f'{row["name"]} {copy}' if copy else row['name'],
+                'measurement_unit': row['measurement_unit'],
+            }
+            for copy in range(options['scale'])
+            for pk, row in enumerate(seed)
+        ]
+        index = IngredientIndex(tracks_table=False)
+        started = perf_counter()
+        index.fill(rows, None)
+        self.stdout.write(
+            f'каталог {len(rows)} шт., индекс построен за '
+            f'{(perf_counter() - started) * 1000:.0f} мс'
+        )
+
+        random = Random(0)
+        keystrokes = []
+        for row in random.sample(seed, options['queries']):
+            word = row['name'].split()[0]
+            start = random.randrange(max(len(word) - 3, 1))
+            for end in range(start + 1, len(word) + 1):
+                keystrokes.append(word[start:end])
+        limit = settings.INGREDIENT_SEARCH_LIMIT
+        folded = [(fold(row['name']), row) for row in rows]
+
+        def scan(query):
+            query = fold(query)
+            return [row for key, row in folded if query in key][:limit]
+
+        for title, search in (
+            ('индекс', index.search),
+            ('линейный просмотр', scan),
+        ):
+            self.report(title, [
+                self.measure(search, query) for query in keystrokes
+            ])
+        typos = []
+        for row in random.sample(seed, options['queries']):
+            name = row['name']
+            drop = random.randrange(len(name))
+            typos.append(name[:drop] + name[drop + 1:])
+        trigrams = [(word_trigrams(key), row) for key, row in folded]
+        threshold = settings.INGREDIENT_FUZZY_THRESHOLD
+
+        def fuzzy_scan(query):
+            grams = word_trigrams(fold(query))
+            ranked = []
+            for other, row in trigrams:
+                shared = len(grams & other)
+                if shared / (len(grams) + len(other) - shared) >= threshold:
+                    ranked.append(row)
+            return ranked
+
+        for title, search in (
+            ('опечатки, индекс', index.fuzzy),
+            ('опечатки, линейный просмотр', fuzzy_scan),
+        ):
+            self.report(title, [
+                self.measure(search, query) for query in typos
+            ])
+
+    @staticmethod
+    def measure(search, query):
+        started = perf_counter()
+        search(query)
+        return perf_counter() - started
+
+    def report(self, title, timings):
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[int(len(timings) * 0.99)]
+        self.stdout.write(
+            f'{title}: {len(timings)} нажатий, p50 {p50 * 1000:.3f} мс, '
+            f'p99 {p99 * 1000:.3f} мс'
+        )
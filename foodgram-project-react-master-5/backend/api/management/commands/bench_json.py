@@ -0,0 +1,115 @@
+import base64
+import json
+import os
+import timeit
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, JSONFragment, orjson
+
+
+def make_recipe(pk):
+    return {
+        'id': pk,
+        'tags': [
+            {'id': 1, 'name': 'Завтрак', 'color': '#E26C2D',
+             'slug': 'breakfast'},
+            {'id': 2, 'name': 'Обед', 'color': '#49B64E', 'slug': 'lunch'},
+        ],
+        'author': {
+            'id': pk % 50, 'username': f'user{pk % 50}',
+            'first_name': 'Иван', 'last_name': 'Петров',
+            'email': f'user{pk % 50}@example.ru', 'is_subscribed': False,
+        },
+        'ingredients': [
+            {'id': pk * 10 + i, 'name': f'ингредиент {i}',
+             'measurement_unit': 'г', 'amount': 100 + i}
+            for i in range(8)
+        ],
+        'is_favorited': False,
+        'is_in_shopping_cart': True,
+        'name': f'Рецепт номер {pk}',
+        'image': f'http://foodgram.example/media/recipes/{pk:012d}.png',
+        'text': 'Нарезать, обжарить, потушить и подавать горячим. ' * 6,
+        'cooking_time': 30,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стандартный JSONRenderer/JSONParser DRF '
+        'с FastJSONRenderer/FastJSONParser на типичных ответах и запросах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=50)
+
+    def handle(self, *args, **options):
+        number = options['number']
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson не установлен, быстрый кодек работает через json.'
+            ))
+        with open(os.path.join(settings.BASE_DIR, 'data', 'ingredients.json'),
+                  encoding='utf-8') as file:
+            ingredients = [
+                dict(id=pk, **row) for pk, row in enumerate(json.load(file))
+            ]
+        page = {
+            'count': 10000, 'next': None,
+            'previous': None,
+            'results': [make_recipe(pk) for pk in range(100)],
+        }
+        fragments = dict(page, results=[
+            JSONFragment(JSONRenderer().render(recipe))
+            for recipe in page['results']
+        ])
+        image = base64.b64encode(os.urandom(3 * 1024 * 1024)).decode()
+        create_body = json.dumps({
+            'ingredients': [{'id': i, 'amount': 10} for i in range(20)],
+            'tags': [1, 2], 'name': 'Рецепт', 'text': 'Текст' * 200,
+            'cooking_time': 10, 'image': f'data:image/png;base64,{image}',
+        }).encode()
+
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        for title, data in (
+            (f'ингредиенты ({len(ingredients)} шт.)', ingredients),
+            ('страница из 100 рецептов', page),
+        ):
+            assert drf.render(data) == fast.render(data)
+            self.report(
+                f'рендер: {title}',
+                self.measure(lambda: drf.render(data), number),
+                self.measure(lambda: fast.render(data), number),
+            )
+        assert drf.render(page) == fast.render(fragments)
+        self.report(
+            'рендер: та же страница из готовых фрагментов',
+            self.measure(lambda: drf.render(page), number),
+            self.measure(lambda: fast.render(fragments), number),
+        )
+
+        parsers = (JSONParser(), FastJSONParser())
+        timings = [
+            self.measure(lambda p=p: p.parse(BytesIO(create_body)), number)
+            for p in parsers
+        ]
+        self.report(
+            f'разбор: создание рецепта ({len(create_body) // 1024} КБ)',
+            *timings
+        )
+
+    @staticmethod
+    def measure(func, number):
+        return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+    def report(self, title, drf, fast):
+        self.stdout.write(
+            f'{title}: drf {drf * 1000:.3f} мс, fast {fast * 1000:.3f} мс, '
+            f'x{drf / fast:.1f}'
+        )
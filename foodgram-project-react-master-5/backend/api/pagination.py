@@ -1,8 +1,154 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import cached_property, partial
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.counting import QuerysetCounter
+
+
+class CountedPaginator(Paginator):
+    """
+    Пагинатор, который получает число объектов от QuerysetCounter.
+    У готового списка число объектов — его длина.
+    """
+
+    def __init__(self, *args, counter, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counter = counter
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        count, self.count_exact = self.counter.count(self.object_list)
+        return count
 
 
 class LimitPageNumberPagination(PageNumberPagination):
-    """Класс пагинации."""
+    """
+    Класс пагинации.
+    Если представление задаёт keyset_ordering и в запросе есть параметр
+    cursor, страница выбирается по ключу сортировки без OFFSET и COUNT(*);
+    с cursor_only у представления — всегда, начиная с первой страницы.
+    Выборку со своей сортировкой, например по релевантности поиска,
+    курсором не листают: такой запрос отклоняется с ошибкой 400.
+    Число объектов считает QuerysetCounter; count_versions представления
+    перечисляет версии данных, от которых зависит закэшированный count.
+    Поле count_exact: false появляется в ответе, только когда count —
+    оценка планировщика, остальные ответы совпадают с обычными.
+    """
     page_size_query_param = 'limit'
     page_size = settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    cursor_ordering_message = (
+        'Курсор не поддерживает эту сортировку, листайте по page.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_ordering = getattr(view, 'keyset_ordering', None)
+        self.use_cursor = bool(
+            self.keyset_ordering
+            and (
+                getattr(view, 'cursor_only', False)
+                or self.cursor_query_param in request.query_params
+            )
+        )
+        if not self.use_cursor:
+            self.django_paginator_class = partial(
+                CountedPaginator,
+                counter=QuerysetCounter(getattr(view, 'count_versions', ())),
+            )
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_queryset_by_cursor(queryset, request)
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            paginator = self.page.paginator
+            fields = [('count', paginator.count)]
+            if not paginator.count_exact:
+                fields.append(('count_exact', False))
+            return Response(OrderedDict([
+                *fields,
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ]))
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'previous': None,
+            'results': data,
+        })
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        ordering = tuple(queryset.query.order_by)
+        if ordering and ordering != tuple(self.keyset_ordering):
+            raise ParseError(self.cursor_ordering_message)
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param, ''),
+            queryset.model,
+        )
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position))
+        page = list(queryset.order_by(*self.keyset_ordering)[:page_size + 1])
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def get_seek_filter(self, position):
+        """Условие «строго после позиции» для составного ключа сортировки."""
+        seek = Q()
+        equal = Q()
+        for field, value in zip(self.keyset_ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return seek
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [
+            getattr(last, field.lstrip('-')) for field in self.keyset_ordering
+        ]
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position)
+        )
+
+    def encode_cursor(self, position):
+        raw = json.dumps(
+            [value.isoformat() if hasattr(value, 'isoformat') else value
+             for value in position]
+        )
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.keyset_ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.keyset_ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
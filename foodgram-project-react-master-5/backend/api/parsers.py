@@ -0,0 +1,24 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from api.renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSON-парсер на orjson; без orjson работает как JSONParser."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            raw = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                raw = raw.decode(encoding)
+            return orjson.loads(raw)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
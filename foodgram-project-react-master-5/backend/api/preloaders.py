@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+from django.db import models
+from django.db.models.functions import RowNumber
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+
+class RelationsPreloader:
+    """
+    Связи текущего пользователя с рецептами и авторами страницы.
+    Загружает избранное, корзину и подписки за постоянное число запросов,
+    сериализаторы читают из него флаги вместо запроса на каждую строку.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.favorites = set()
+        self.shopping_carts = set()
+        self.subscriptions = set()
+
+    def load(self, recipe_ids=(), author_ids=()):
+        recipe_ids = set(recipe_ids)
+        author_ids = set(author_ids)
+        if not self.user.is_authenticated:
+            return self
+        if recipe_ids:
+            self.favorites = set(Favorite.objects.filter(
+                user=self.user, recipe_id__in=recipe_ids
+            ).values_list('recipe_id', flat=True))
+            self.shopping_carts = set(ShoppingCart.objects.filter(
+                user=self.user, recipe_id__in=recipe_ids
+            ).values_list('recipe_id', flat=True))
+        if author_ids:
+            self.subscriptions = set(Subscription.objects.filter(
+                follower=self.user, author_id__in=author_ids
+            ).values_list('author_id', flat=True))
+        return self
+
+    def is_favorited(self, recipe_id) -> bool:
+        return recipe_id in self.favorites
+
+    def is_in_shopping_cart(self, recipe_id) -> bool:
+        return recipe_id in self.shopping_carts
+
+    def is_subscribed(self, author_id) -> bool:
+        return author_id in self.subscriptions
+
+
+class PreloadRelationsMixin:
+    """
+    Добавляет в контекст сериализатора предзагруженные связи
+    для объектов, которые отдаются в действиях preload_actions.
+    """
+
+    preload_actions = ('list', 'retrieve')
+
+    def get_serializer(self, *args, **kwargs):
+        if args and self.action in self.preload_actions:
+            kwargs.setdefault('context', self.get_serializer_context())
+            kwargs['context']['relations'] = self.preload_relations(args[0])
+        return super().get_serializer(*args, **kwargs)
+
+    def preload_relations(self, instances):
+        if instances is None:
+            instances = []
+        elif isinstance(instances, models.Model):
+            instances = [instances]
+        recipe_ids, author_ids = [], []
+        for instance in instances:
+            if isinstance(instance, Recipe):
+                recipe_ids.append(instance.id)
+                author_ids.append(instance.author_id)
+            else:
+                author_ids.append(instance.id)
+        return RelationsPreloader(self.request.user).load(
+            recipe_ids=recipe_ids, author_ids=author_ids
+        )
+
+
+def get_recipes_limit(request):
+    """Параметр recipes_limit: число рецептов автора в подписках."""
+    recipes_limit = request.query_params.get('recipes_limit')
+    if not recipes_limit:
+        return None
+    if not recipes_limit.isdigit():
+        raise ValidationError(
+            {'recipes_limit': 'Ожидается неотрицательное целое число.'}
+        )
+    return int(recipes_limit)
+
+
+def get_top_recipes(author_ids, limit=None):
+    """
+    Последние рецепты авторов, не больше limit на автора, одним запросом:
+    номер рецепта внутри автора считает оконная функция.
+    """
+    ordering = (models.F('pub_date').desc(), models.F('id').desc())
+    recipes = Recipe.objects.filter(author_id__in=author_ids)
+    if limit is not None:
+        recipes = recipes.annotate(position=models.Window(
+            RowNumber(), partition_by=models.F('author_id'), order_by=ordering
+        )).filter(position__lte=limit)
+    return recipes.order_by(*ordering)
+
+
+def group_by_author(recipes):
+    """Рецепты или строки values() по id автора, порядок сохраняется."""
+    grouped = defaultdict(list)
+    for recipe in recipes:
+        author_id = (
+            recipe['author_id'] if isinstance(recipe, dict)
+            else recipe.author_id
+        )
+        grouped[author_id].append(recipe)
+    return grouped
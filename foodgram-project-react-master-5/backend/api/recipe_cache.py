@@ -0,0 +1,160 @@
+import re
+from collections import OrderedDict
+from threading import Lock
+from uuid import uuid4
+
+from django.conf import settings
+
+from api.renderers import JSONFragment, dumps
+from api.serializers.fast import render_recipe_bodies
+from api.serializers.recipes import RecipeReadSerializer
+from recipes.models import Recipe
+
+
+class LRUCache:
+    """Ограниченный по числу записей кэш с вытеснением давно не читанных."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+recipe_bodies = LRUCache(settings.RECIPE_BODY_CACHE_SIZE)
+# Поля рецепта, которые нужны get_recipe_bodies для ключей кэша.
+BODY_KEY_FIELDS = ('id', 'author_id', 'version')
+
+
+def recipe_body_queryset():
+    return Recipe.objects.prefetch_related(
+        'recipebook_set__ingredient', 'tags'
+    ).select_related('author')
+
+
+def build_recipe_bodies(recipe_ids):
+    if settings.FAST_READ_SERIALIZERS:
+        return render_recipe_bodies(recipe_ids)
+    return RecipeReadSerializer(
+        recipe_body_queryset().filter(id__in=recipe_ids), many=True
+    ).data
+
+
+def get_body_keys(recipes):
+    """
+    Ключ тела рецепта: id и версия из строки рецепта, которую страница
+    уже прочитала. Любая запись в данные выдачи увеличивает версию в той
+    же транзакции, старое тело вытесняется по LRU.
+    """
+    return {recipe.id: (recipe.id, recipe.version) for recipe in recipes}
+
+
+SLOT = uuid4().hex
+SLOTS = ('is_favorited', 'is_in_shopping_cart', 'image', 'images')
+SLOT_PATTERN = re.compile(rb'"' + SLOT.encode() + rb'(\w+)"')
+
+
+class RecipeBody:
+    """
+    Тело рецепта и его JSON-заготовка: закодированные куски, между
+    которыми подставляются флаги пользователя и абсолютные URL картинок.
+    """
+
+    __slots__ = ('data', 'segments')
+
+    def __init__(self, data):
+        self.data = data
+        marked = dict(data, **{name: SLOT + name for name in SLOTS})
+        marked['author'] = dict(
+            data['author'], is_subscribed=SLOT + 'is_subscribed'
+        )
+        self.segments = SLOT_PATTERN.split(dumps(marked))
+
+
+def get_recipe_bodies(recipes):
+    """
+    Общая для всех пользователей часть выдачи рецептов.
+    Промахи кэша сериализуются разом, одним набором запросов.
+    """
+    keys = get_body_keys(recipes)
+    bodies = {
+        recipe.id: recipe_bodies.get(keys[recipe.id]) for recipe in recipes
+    }
+    missing = [
+        recipe_id for recipe_id, body in bodies.items() if body is None
+    ]
+    if missing:
+        for data in build_recipe_bodies(missing):
+            body = RecipeBody(data)
+            recipe_bodies.set(keys[data['id']], body)
+            bodies[data['id']] = body
+    return [bodies[recipe.id] for recipe in recipes if recipe.id in bodies]
+
+
+def get_user_data(body, request, relations):
+    """Флаги пользователя и абсолютные URL картинки для тела рецепта."""
+    image = body.data['image']
+    images = body.data['images']
+    if request is not None:
+        if image:
+            image = request.build_absolute_uri(image)
+        if images:
+            images = {
+                extension: {
+                    width: request.build_absolute_uri(url)
+                    for width, url in urls.items()
+                }
+                for extension, urls in images.items()
+            }
+    return {
+        'is_subscribed': relations.is_subscribed(body.data['author']['id']),
+        'is_favorited': relations.is_favorited(body.data['id']),
+        'is_in_shopping_cart': relations.is_in_shopping_cart(
+            body.data['id']
+        ),
+        'image': image,
+        'images': images,
+    }
+
+
+def overlay_user_data(body, request, relations):
+    """Накладывает данные пользователя на тело рецепта."""
+    user_data = get_user_data(body, request, relations)
+    return {
+        **body.data,
+        'author': {
+            **body.data['author'],
+            'is_subscribed': user_data.pop('is_subscribed'),
+        },
+        **user_data,
+    }
+
+
+def render_user_fragment(body, request, relations):
+    """То же, что overlay_user_data, но сразу в виде готового JSON."""
+    user_data = get_user_data(body, request, relations)
+    segments = body.segments
+    chunks = [segments[0]]
+    for index in range(1, len(segments), 2):
+        chunks.append(dumps(user_data[segments[index].decode()]))
+        chunks.append(segments[index + 1])
+    return JSONFragment(b''.join(chunks))
@@ -0,0 +1,96 @@
+import json
+import math
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONFragment:
+    """Уже закодированный JSON, который рендерер вставляет как есть."""
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def decode(self):
+        return json.loads(self.raw)
+
+
+def resolve_fragments(data):
+    """Раскрывает фрагменты для кодировщиков, которые их не понимают."""
+    if isinstance(data, JSONFragment):
+        return data.decode()
+    if isinstance(data, dict):
+        return {key: resolve_fragments(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [resolve_fragments(value) for value in data]
+    return data
+
+
+def has_non_finite(data):
+    """Есть ли в данных NaN или бесконечность: orjson пишет их как null."""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(has_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(has_non_finite(value) for value in data)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson с выдачей, совпадающей с JSONRenderer.
+    Фрагменты JSONFragment вставляются в ответ без повторного кодирования.
+    Даты и время кодирует кодировщик DRF; данные с NaN и бесконечностями,
+    как и отступы (browsable API), идут стандартным путём, который их
+    отвергает так же, как JSONRenderer. Без orjson путь всегда стандартный.
+    """
+
+    accepts_fragments = True
+    drf_encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None or indent is not None
+            or not self.compact or not self.strict
+        ):
+            return self.render_standard(
+                data, accepted_media_type, renderer_context
+            )
+        ret = orjson.dumps(data, default=self.default, option=(
+            orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        ))
+        if b'null' in ret and has_non_finite(data):
+            return self.render_standard(
+                data, accepted_media_type, renderer_context
+            )
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
+
+    def render_standard(self, data, accepted_media_type, renderer_context):
+        return super().render(
+            resolve_fragments(data), accepted_media_type, renderer_context
+        )
+
+    def default(self, obj):
+        if isinstance(obj, JSONFragment):
+            return orjson.Fragment(obj.raw)
+        return self.drf_encoder.default(obj)
+
+
+def dumps(data):
+    """Кодирует данные так же, как FastJSONRenderer."""
+    return FastJSONRenderer().render(data)
@@ -0,0 +1,272 @@
+import re
+from bisect import bisect_left, insort
+from heapq import nsmallest
+from itertools import islice
+from math import ceil
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max
+
+from api.catalog import IngredientSnapshot
+from recipes.models import DeletedIngredient, Ingredient
+
+SPACES = re.compile(r'\s+')
+NGRAM = 3
+
+
+def fold(text):
+    """Ключ поиска: регистр, ё/е и пробелы не различаются."""
+    return SPACES.sub(' ', text.casefold().replace('ё', 'е')).strip()
+
+
+def ngrams(key, size=NGRAM):
+    return {key[i:i + size] for i in range(len(key) - size + 1)}
+
+
+def word_trigrams(key):
+    """Триграммы слов с отбивкой пробелами, как в pg_trgm."""
+    grams = set()
+    for word in key.split():
+        grams |= ngrams(f'  {word} ')
+    return grams
+
+
+def all_ngrams(key):
+    """Все подстроки ключа длиной от 1 до NGRAM."""
+    grams = set()
+    for size in range(1, NGRAM + 1):
+        grams |= ngrams(key, size)
+    return grams
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+    Ключи отсортированы: совпадения по началу названия находятся
+    бинарным поиском, вхождения в середину — по спискам подстрок длиной
+    до NGRAM символов. Порядок выдачи стабилен: сначала совпадения по началу,
+    затем остальные вхождения, внутри групп — по названию и id.
+    Для опечаток есть нечёткий поиск по сходству триграмм слов.
+    Индекс перечитывается при смене состояния таблицы — наибольшей метки
+    Ingredient.version и числа записей, как у IngredientSnapshot, — так
+    что загрузка из upload_json_to_db или другого процесса видна сразу.
+    Индекс без tracks_table заполняется только через fill.
+    """
+
+    def __init__(self, tracks_table=True):
+        self.lock = Lock()
+        self.tracks_table = tracks_table
+        self.version = None
+        self.rows = {}
+        self.keys = {}
+        self.entries = []
+        self.postings = {}
+        self.trigrams = {}
+        self.similar = {}
+
+    def ensure_fresh(self):
+        if not self.tracks_table:
+            return
+        version = IngredientSnapshot.get_totals()
+        if version == self.version:
+            return
+        self.fill(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            version,
+        )
+
+    def fill(self, rows, version):
+        with self.lock:
+            self.rows = {}
+            self.keys = {}
+            self.entries = []
+            self.postings = {}
+            self.trigrams = {}
+            self.similar = {}
+            for row in rows:
+                self.add(row, ordered=False)
+            self.entries.sort()
+            self.version = version
+
+    def add(self, row, ordered=True):
+        key = fold(row['name'])
+        self.rows[row['id']] = row
+        self.keys[row['id']] = key
+        if ordered:
+            insort(self.entries, (key, row['id']))
+        else:
+            self.entries.append((key, row['id']))
+        for gram in all_ngrams(key):
+            self.postings.setdefault(gram, set()).add(row['id'])
+        self.trigrams[row['id']] = word_trigrams(key)
+        for gram in self.trigrams[row['id']]:
+            self.similar.setdefault(gram, set()).add(row['id'])
+
+    def remove(self, pk):
+        if self.rows.pop(pk, None) is None:
+            return
+        key = self.keys.pop(pk)
+        position = bisect_left(self.entries, (key, pk))
+        if self.entries[position:position + 1] == [(key, pk)]:
+            del self.entries[position]
+        for gram in all_ngrams(key):
+            self.postings[gram].discard(pk)
+        for gram in self.trigrams.pop(pk):
+            self.similar[gram].discard(pk)
+
+    def apply(self, changed=(), deleted=(), created=0):
+        """
+        Точечное обновление после записи в этом процессе: строки changed
+        несут свою метку version, created из них — новые, метки удаления
+        deleted читаются из DeletedIngredient.
+        Если таблицу успел изменить кто-то ещё, состояние не совпадёт
+        с ожидаемым, и индекс перечитается целиком при следующем поиске.
+        """
+        with self.lock:
+            if self.version is None:
+                return
+            version, count = self.version
+            for row in changed:
+                row = dict(row)
+                version = max(version, row.pop('version'))
+                self.remove(row['id'])
+                self.add(row)
+            for pk in deleted:
+                self.remove(pk)
+            if deleted:
+                version = max(version, DeletedIngredient.objects.filter(
+                    ingredient_id__in=deleted
+                ).aggregate(version=Max('version'))['version'] or 0)
+            expected = (version, count + created - len(deleted))
+            current = IngredientSnapshot.get_totals()
+            self.version = current if current == expected else None
+
+    def search(self, query, limit=None):
+        limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+        query = fold(query)
+        if not query:
+            return []
+        self.ensure_fresh()
+        with self.lock:
+            entries = self.entries
+            found = []
+            position = bisect_left(entries, (query,))
+            while (
+                len(found) < limit and position < len(entries)
+                and entries[position][0].startswith(query)
+            ):
+                found.append(entries[position][1])
+                position += 1
+            if len(found) < limit:
+                prefix = set(found)
+                found += [
+                    pk for pk in self.substring_matches(query, limit * 2)
+                    if pk not in prefix
+                ][:limit - len(found)]
+            return [self.rows[pk] for pk in found]
+
+    def substring_matches(self, query, limit):
+        """
+        Первые limit названий, содержащих query, в порядке ключей.
+        При плотных совпадениях entries просматриваются по порядку
+        до первых limit, при редких — отбираются наименьшие из кандидатов.
+        """
+        if len(query) <= NGRAM:
+            candidates = self.postings.get(query, set())
+        else:
+            sets = sorted(
+                (self.postings.get(gram, set()) for gram in ngrams(query)),
+                key=len,
+            )
+            candidates = sets[0]
+            for ids in sets[1:]:
+                candidates = candidates & ids
+        keys = self.keys
+        if len(candidates) ** 2 > limit * len(keys):
+            matches = (
+                pk for key, pk in self.entries
+                if pk in candidates and query in key
+            )
+            return list(islice(matches, limit))
+        return [pk for _, pk in nsmallest(limit, (
+            (keys[pk], pk) for pk in candidates if query in keys[pk]
+        ))]
+
+    def fuzzy(self, query, limit=None, exclude=()):
+        """
+        Названия, похожие на query, по убыванию сходства триграмм.
+        У похожего названия не меньше threshold * len(grams) общих
+        триграмм, поэтому кандидаты берутся только из списков самых
+        редких триграмм запроса, а сходство проверяется точно.
+        """
+        limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+        threshold = settings.INGREDIENT_FUZZY_THRESHOLD
+        grams = word_trigrams(fold(query))
+        if not grams:
+            return []
+        self.ensure_fresh()
+        with self.lock:
+            postings = sorted(
+                (self.similar.get(gram, set()) for gram in grams), key=len
+            )
+            required = max(ceil(threshold * len(grams)), 1)
+            candidates = set().union(*postings[:len(grams) - required + 1])
+            ranked = []
+            for pk in candidates - set(exclude):
+                other = self.trigrams[pk]
+                shared = len(grams & other)
+                score = shared / (len(grams) + len(other) - shared)
+                if score >= threshold:
+                    ranked.append((-score, self.keys[pk], pk))
+            return [
+                self.rows[pk] for _, _, pk in nsmallest(limit, ranked)
+            ]
+
+
+ingredient_index = IngredientIndex()
+
+
+def fuzzy_ingredients(query, limit, exclude):
+    """
+    Нечёткий поиск: на PostgreSQL по GIN-индексу pg_trgm,
+    на остальных базах по индексу в памяти. Порог сходства в обоих
+    случаях — INGREDIENT_FUZZY_THRESHOLD: на PostgreSQL он задаётся
+    оператору % на время запроса и проверяется ещё и явно.
+    """
+    if connection.vendor != 'postgresql':
+        return ingredient_index.fuzzy(query, limit, exclude)
+    from django.contrib.postgres.lookups import TrigramSimilar
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    threshold = settings.INGREDIENT_FUZZY_THRESHOLD
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                [str(threshold)],
+            )
+        return list(
+            Ingredient.objects.filter(
+                TrigramSimilar(F('name'), query)
+            ).exclude(id__in=exclude).annotate(
+                similarity=TrigramSimilarity('name', query)
+            ).filter(similarity__gte=threshold).order_by(
+                '-similarity', 'name', 'id'
+            ).values('id', 'name', 'measurement_unit')[:limit]
+        )
+
+
+def search_ingredients(query, fuzzy=False):
+    """
+    Автодополнение: совпадения по началу, затем вхождения.
+    С fuzzy, если их не хватает до лимита, — ещё и похожие названия.
+    """
+    limit = settings.INGREDIENT_SEARCH_LIMIT
+    rows = ingredient_index.search(query, limit)
+    if fuzzy and len(rows) < limit and settings.INGREDIENT_SEARCH_FUZZY:
+        rows += fuzzy_ingredients(
+            query, limit - len(rows), {row['id'] for row in rows}
+        )
+    return rows
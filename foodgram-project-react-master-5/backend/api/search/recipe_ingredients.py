@@ -0,0 +1,138 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+from threading import Lock
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from api.versions import get_version
+from recipes.models import Recipebook
+
+VERSION = 'recipe_ingredients'
+
+
+class RecipeIngredientIndex:
+    """
+    Обратный индекс ингредиент → рецепты в памяти процесса для поиска
+    «что приготовить из того, что есть». Для каждого ингредиента хранится
+    отсортированный массив id рецептов, для рецепта — его ингредиенты.
+    Совпадения считаются по массивам выбранных ингредиентов, без запросов.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.recipes = {}
+        self.postings = {}
+
+    def ensure_fresh(self):
+        version = get_version(VERSION)
+        if version == self.version:
+            return
+        self.fill(
+            Recipebook.objects.values_list(
+                'recipe_id', 'ingredient_id'
+            ).order_by('ingredient_id', 'recipe_id').iterator(),
+            version,
+        )
+
+    def fill(self, rows, version):
+        """Строки (рецепт, ингредиент) в порядке ингредиента и рецепта."""
+        with self.lock:
+            recipes = {}
+            postings = {}
+            for recipe_id, ingredient_id in rows:
+                recipes.setdefault(recipe_id, []).append(ingredient_id)
+                if ingredient_id not in postings:
+                    postings[ingredient_id] = array('q')
+                postings[ingredient_id].append(recipe_id)
+            self.recipes = {
+                recipe_id: tuple(ingredient_ids)
+                for recipe_id, ingredient_ids in recipes.items()
+            }
+            self.postings = postings
+            self.version = version
+
+    def add(self, recipe_id, ingredient_ids):
+        if not ingredient_ids:
+            return
+        self.recipes[recipe_id] = tuple(sorted(ingredient_ids))
+        for ingredient_id in ingredient_ids:
+            insort(
+                self.postings.setdefault(ingredient_id, array('q')),
+                recipe_id,
+            )
+
+    def remove(self, recipe_id):
+        for ingredient_id in self.recipes.pop(recipe_id, ()):
+            recipe_ids = self.postings[ingredient_id]
+            position = bisect_left(recipe_ids, recipe_id)
+            if (
+                position < len(recipe_ids)
+                and recipe_ids[position] == recipe_id
+            ):
+                del recipe_ids[position]
+
+    def apply(self, recipe_ids):
+        """
+        Перечитывает ингредиенты рецептов после записи в этом процессе.
+        Если версию успел сменить кто-то ещё, индекс перечитывается целиком
+        при следующем поиске.
+        """
+        with self.lock:
+            if self.version is None:
+                return
+            ingredients = {}
+            for recipe_id, ingredient_id in Recipebook.objects.filter(
+                recipe_id__in=recipe_ids
+            ).values_list('recipe_id', 'ingredient_id'):
+                ingredients.setdefault(recipe_id, []).append(ingredient_id)
+            for recipe_id in recipe_ids:
+                self.remove(recipe_id)
+                self.add(recipe_id, ingredients.get(recipe_id))
+            expected = self.version + 1
+            current = get_version(VERSION)
+            self.version = current if current == expected else None
+
+    def rank(self, ingredient_ids):
+        """
+        Рецепты, где есть хотя бы один из ингредиентов, по убыванию доли
+        имеющихся ингредиентов, затем числа совпадений и новизны:
+        список (id рецепта, совпало, всего).
+        """
+        self.ensure_fresh()
+        with self.lock:
+            matched = Counter(chain.from_iterable(
+                self.postings.get(ingredient_id, ())
+                for ingredient_id in set(ingredient_ids)
+            ))
+            ranked = [
+                (recipe_id, count, len(self.recipes[recipe_id]))
+                for recipe_id, count in matched.items()
+            ]
+        ranked.sort(key=lambda item: (
+            -item[1] / item[2], -item[1], -item[0]
+        ))
+        return ranked
+
+
+recipe_ingredient_index = RecipeIngredientIndex()
+
+
+def rank_in_db(ingredient_ids):
+    """То же ранжирование группировкой Recipebook в БД."""
+    rows = Recipebook.objects.values('recipe_id').annotate(
+        matched=Count('id', filter=Q(ingredient_id__in=ingredient_ids)),
+        total=Count('id'),
+    ).filter(matched__gt=0).values_list('recipe_id', 'matched', 'total')
+    return sorted(rows, key=lambda item: (
+        -item[1] / item[2], -item[1], -item[0]
+    ))
+
+
+def rank_recipes_by_ingredients(ingredient_ids):
+    if settings.RECIPE_INGREDIENT_INDEX:
+        return recipe_ingredient_index.rank(ingredient_ids)
+    return rank_in_db(ingredient_ids)
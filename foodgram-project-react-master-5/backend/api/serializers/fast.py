@@ -0,0 +1,174 @@
+"""
+Быстрый путь чтения: выдача собирается из строк values() по заранее
+скомпилированному плану полей DRF-сериализатора, без вызова
+to_representation для каждого поля. Результат совпадает с выдачей
+соответствующего сериализатора; отключается FAST_READ_SERIALIZERS.
+"""
+from collections import defaultdict
+from functools import lru_cache
+
+from rest_framework import serializers
+
+import api.serializers.recipes as recipes_serializers
+import api.serializers.users as users_serializers
+from api.catalog import tag_catalog
+from api.fields import ImageVariantsField, image_variant_urls
+from api.preloaders import get_top_recipes, group_by_author
+from recipes.models import Recipe, Recipebook, RecipeTags
+from users.models import User
+
+IMAGE = 'image'
+IMAGES = 'images'
+
+
+class FieldPlan:
+    """
+    План полей сериализатора: имя в выдаче, ключ строки values()
+    и преобразование значения. Вложенные сериализаторы и
+    SerializerMethodField помечаются ключом None и подставляются снаружи.
+    """
+
+    def __init__(self, serializer_class):
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, (serializers.BaseSerializer,
+                                  serializers.SerializerMethodField)):
+                self.fields.append((name, None, None))
+                continue
+            key = field.source.replace('.', '__')
+            self.fields.append((name, key, self.get_converter(field)))
+        self.value_keys = tuple(
+            dict.fromkeys(key for _, key, _ in self.fields if key)
+        )
+
+    @staticmethod
+    def get_converter(field):
+        if isinstance(field, ImageVariantsField):
+            return IMAGES
+        if isinstance(field, serializers.FileField):
+            return IMAGE
+        if isinstance(field, serializers.IntegerField):
+            return int
+        if isinstance(field, serializers.CharField):
+            return str
+        return None
+
+    def row_from(self, instance):
+        return {key: getattr(instance, key) for key in self.value_keys}
+
+    def render(self, row, computed=None, request=None):
+        data = {}
+        for name, key, convert in self.fields:
+            if key is None:
+                data[name] = computed[name]
+                continue
+            value = row[key]
+            if value is None or convert is None:
+                data[name] = value
+            elif convert is IMAGE:
+                data[name] = image_url(value, request)
+            elif convert is IMAGES:
+                data[name] = image_variant_urls(value, request)
+            else:
+                data[name] = convert(value)
+        return data
+
+
+def image_url(name, request):
+    """Повторяет ImageField.to_representation для имени файла."""
+    if not name:
+        return None
+    url = Recipe._meta.get_field('image').storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+@lru_cache(maxsize=None)
+def get_plan(serializer_class):
+    return FieldPlan(serializer_class)
+
+
+def get_tag_rows(recipe_ids):
+    """Теги рецептов: связи из БД, сами теги из каталога."""
+    tag_ids = defaultdict(list)
+    for recipe_id, tag_id in RecipeTags.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'tags_id'):
+        tag_ids[recipe_id].append(tag_id)
+    return defaultdict(list, {
+        recipe_id: tag_catalog.serialize(ids)
+        for recipe_id, ids in tag_ids.items()
+    })
+
+
+def get_ingredient_rows(recipe_ids):
+    plan = get_plan(recipes_serializers.RecipebookSerializer)
+    rows = defaultdict(list)
+    for row in Recipebook.objects.filter(recipe_id__in=recipe_ids).values(
+        'recipe_id', *plan.value_keys
+    ).order_by('id'):
+        rows[row['recipe_id']].append(plan.render(row))
+    return rows
+
+
+def render_recipe_bodies(recipe_ids):
+    """
+    Выдача RecipeReadSerializer без request: флаги пользователя ложны,
+    URL картинки относительный. Четыре запроса на любое число рецептов.
+    """
+    recipe_plan = get_plan(recipes_serializers.RecipeReadSerializer)
+    user_plan = get_plan(users_serializers.UserReadSerializer)
+    recipes = list(Recipe.objects.filter(id__in=recipe_ids).values(
+        'author_id', *recipe_plan.value_keys
+    ).order_by())
+    authors = {
+        row['id']: row for row in User.objects.filter(
+            id__in={recipe['author_id'] for recipe in recipes}
+        ).values(*user_plan.value_keys)
+    }
+    tags = get_tag_rows(recipe_ids)
+    ingredients = get_ingredient_rows(recipe_ids)
+    bodies = {}
+    for recipe in recipes:
+        author = user_plan.render(
+            authors[recipe['author_id']], {'is_subscribed': False}
+        )
+        bodies[recipe['id']] = recipe_plan.render(recipe, {
+            'tags': tags[recipe['id']],
+            'author': author,
+            'ingredients': ingredients[recipe['id']],
+            'is_favorited': False,
+            'is_in_shopping_cart': False,
+        })
+    return [bodies[pk] for pk in recipe_ids if pk in bodies]
+
+
+def render_short_recipes(rows, request=None, serializer_class=None):
+    """Карточки рецептов: ShortRecipeSerializer и его аналоги."""
+    plan = get_plan(
+        serializer_class or recipes_serializers.ShortRecipeSerializer
+    )
+    return [plan.render(row, request=request) for row in rows]
+
+
+def render_subscriptions(authors, request, recipes_limit=None):
+    """
+    Выдача SubscriptionSerializer для страницы авторов, на которых
+    подписан пользователь: рецепты всех авторов выбираются одним запросом.
+    """
+    user_plan = get_plan(users_serializers.SubscriptionSerializer)
+    recipe_plan = get_plan(recipes_serializers.RecipeSubscriptionSerializer)
+    recipes = group_by_author(get_top_recipes(
+        [author.id for author in authors], recipes_limit
+    ).values('author_id', *recipe_plan.value_keys))
+    return [
+        user_plan.render(user_plan.row_from(author), {
+            'is_subscribed': True,
+            'recipes': render_short_recipes(
+                recipes[author.id], request,
+                recipes_serializers.RecipeSubscriptionSerializer,
+            ),
+        })
+        for author in authors
+    ]
@@ -2,7 +2,9 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers, validators
 
 import api.serializers.users as users_serializers
-from api.fields import Base64ImageField
+from api.fields import (Base64ImageField, CatalogTagField,
+                        ImageVariantsField)
+from api.shopping_list import refresh_recipe_in_shopping_lists
 from foodgram_backend.enum import RecipeMaxLength
 from recipes.models import (Favorite, Ingredient, Recipe, Recipebook,
                             ShoppingCart, Tag)
@@ -55,6 +57,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         many=True,
     )
     image = Base64ImageField()
+    images = ImageVariantsField()
     
     class Meta:
         model = Recipe
@@ -67,12 +70,17 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'images',
+            'image_status',
             'text',
             'cooking_time',
         )
         read_only_fields = fields
     
     def get_is_favorited(self, recipe) -> bool:
+        relations = self.context.get('relations')
+        if relations is not None:
+            return relations.is_favorited(recipe.id)
         request = self.context.get('request')
         return (
                 request is not None
@@ -83,6 +91,9 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         )
     
     def get_is_in_shopping_cart(self, recipe) -> bool:
+        relations = self.context.get('relations')
+        if relations is not None:
+            return relations.is_in_shopping_cart(recipe.id)
         request = self.context.get('request')
         return (
                 request is not None
@@ -107,7 +118,7 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         many=True,
     
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = CatalogTagField(
         many=True,
         queryset=Tag.objects.all(),
     )
@@ -157,9 +168,15 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         
         instance.tags.clear()
         instance.tags.set(tags)
+        previous = set(
+            instance.recipebook_set.values_list('ingredient_id', flat=True)
+        )
         instance.ingredients.clear()
         
         self._create_recipebooks(ingredients, instance)
+        refresh_recipe_in_shopping_lists(instance.id, previous | {
+            ingredient['id'].id for ingredient in ingredients
+        })
         
         super().update(instance, validated_data)
         return instance
@@ -199,10 +216,11 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """ Сериализатор для избранного в рецептах. """
     image = serializers.ImageField(use_url=True)
+    images = ImageVariantsField()
     
     class Meta:
         model = Recipe
-        fields = ['id', 'name', 'image', 'cooking_time']
+        fields = ['id', 'name', 'image', 'images', 'cooking_time']
 
 
 class RecipeSubscriptionSerializer(serializers.ModelSerializer):
@@ -211,10 +229,11 @@ class RecipeSubscriptionSerializer(serializers.ModelSerializer):
         max_length=RecipeMaxLength.NAME
     )
     image = Base64ImageField(use_url=True)
+    images = ImageVariantsField()
     
     class Meta:
         model = Recipe
-        fields = ['id', 'name', 'image', 'cooking_time']
+        fields = ['id', 'name', 'image', 'images', 'cooking_time']
     
     def to_representation(self, instance):
         ret = super().to_representation(instance)
@@ -1,7 +1,7 @@
 from rest_framework import serializers, status
 
 import api.serializers.recipes as recipes_serializers
-from recipes.models import Recipe
+from api.preloaders import get_recipes_limit, get_top_recipes
 from users.models import Subscription, User
 
 
@@ -22,6 +22,9 @@ class UserReadSerializer(serializers.ModelSerializer):
         read_only_fields = fields
     
     def get_is_subscribed(self, obj):
+        relations = self.context.get('relations')
+        if relations is not None:
+            return relations.is_subscribed(obj.id)
         request = self.context.get('request')
         return bool(
             request
@@ -34,25 +37,31 @@ class UserReadSerializer(serializers.ModelSerializer):
 
 
 class SubscriptionSerializer(UserReadSerializer):
-    """ Сериализатор для чтения подписок. """
-    recipes_count = serializers.SerializerMethodField()
+    """
+    Сериализатор для чтения подписок.
+    Страница подписок передаёт в контексте рецепты авторов
+    (author_recipes), recipes_count хранится у пользователя.
+    """
+    recipes_count = serializers.IntegerField(read_only=True)
     recipes = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = UserReadSerializer.Meta.fields + ('recipes_count', 'recipes')
     
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+    def get_is_subscribed(self, obj):
+        if self.context.get('is_subscription_request'):
+            return True
+        return super().get_is_subscribed(obj)
     
     def get_recipes(self, obj):
-        recipes_limit = self.context.get('request').GET.get('recipes_limit')
-        print(f'recipes_limit: {recipes_limit}')
-        print(f'{obj=}')
-        recipes = Recipe.objects.filter(author=obj)
-        print(f'{recipes=}')
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
+        author_recipes = self.context.get('author_recipes')
+        if author_recipes is not None:
+            recipes = author_recipes[obj.id]
+        else:
+            recipes = get_top_recipes(
+                [obj.id], get_recipes_limit(self.context['request'])
+            )
         return recipes_serializers.RecipeSubscriptionSerializer(
             recipes, many=True,
             context=self.context
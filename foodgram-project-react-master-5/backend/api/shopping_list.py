@@ -0,0 +1,386 @@
+"""
+Список покупок: сводная таблица ShoppingListItem и её выгрузка потоком.
+Таблица меняется вместе с корзиной и ингредиентами рецептов, поэтому
+выгрузка читает готовые суммы, по строке на ингредиент.
+"""
+import csv
+import zlib
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from fontTools import subset
+from fontTools.ttLib import TTFont
+
+from recipes.models import Recipebook, ShoppingCart, ShoppingListItem
+
+CHUNK_SIZE = 2000
+TITLE = 'Список покупок'
+
+
+def get_shopping_list(user):
+    """Тройки (ингредиент, единица, количество) по корзине пользователя."""
+    return ShoppingListItem.objects.filter(user=user).values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'amount',
+    ).order_by('ingredient__name', 'ingredient_id').iterator(CHUNK_SIZE)
+
+
+def count_shopping_lists(user_ids=None, ingredient_ids=None):
+    """Суммы {(user_id, ingredient_id): amount}, посчитанные по корзинам."""
+    lookups = {'recipe__shopping_carts__isnull': False}
+    if user_ids is not None:
+        lookups['recipe__shopping_carts__user_id__in'] = user_ids
+    if ingredient_ids is not None:
+        lookups['ingredient_id__in'] = ingredient_ids
+    # Один вызов filter(), чтобы корзины присоединялись к запросу один раз.
+    rows = Recipebook.objects.filter(**lookups)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in rows.values_list(
+            'recipe__shopping_carts__user_id', 'ingredient_id'
+        ).annotate(Sum('amount')).order_by().iterator(CHUNK_SIZE)
+    }
+
+
+def change_shopping_list(user_id, recipe_id, added):
+    """Прибавляет ингредиенты рецепта к списку пользователя или вычитает."""
+    rows = Recipebook.objects.filter(recipe_id=recipe_id).values_list(
+        'ingredient_id', 'amount'
+    )
+    with transaction.atomic():
+        for ingredient_id, amount in rows:
+            items = ShoppingListItem.objects.filter(
+                user_id=user_id, ingredient_id=ingredient_id
+            )
+            if not added:
+                items.filter(amount__lte=amount).delete()
+                items.update(amount=F('amount') - amount)
+            elif not items.update(amount=F('amount') + amount):
+                try:
+                    with transaction.atomic():
+                        ShoppingListItem.objects.create(
+                            user_id=user_id, ingredient_id=ingredient_id,
+                            amount=amount,
+                        )
+                except IntegrityError:
+                    items.update(amount=F('amount') + amount)
+
+
+def refresh_shopping_lists(user_ids=None, ingredient_ids=None):
+    """
+    Пересчитывает суммы заново. Без аргументов — по всем пользователям,
+    иначе только клетки user_ids × ingredient_ids.
+    """
+    totals = count_shopping_lists(user_ids, ingredient_ids)
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    if ingredient_ids is not None:
+        items = items.filter(ingredient_id__in=ingredient_ids)
+    with transaction.atomic():
+        items.delete()
+        ShoppingListItem.objects.bulk_create((
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            )
+            for (user_id, ingredient_id), amount in totals.items()
+        ), batch_size=CHUNK_SIZE)
+
+
+def get_cart_user_ids(recipe_id):
+    return list(ShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True))
+
+
+def refresh_recipe_in_shopping_lists(recipe_id, ingredient_ids):
+    """Пересчёт после замены ингредиентов рецепта, лежащего в корзинах."""
+    user_ids = get_cart_user_ids(recipe_id)
+    if user_ids and ingredient_ids:
+        refresh_shopping_lists(user_ids, set(ingredient_ids))
+
+
+def render_txt(items):
+    yield f'{TITLE}:\n'
+    for name, unit, amount in items:
+        yield f'{name} - {amount} {unit}\n'
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу возвращает записанное."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(items):
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(
+        ('Ингредиент', 'Количество', 'Единица измерения')
+    )
+    for name, unit, amount in items:
+        yield writer.writerow((name, amount, unit))
+
+
+class PDFFont:
+    """
+    Шрифт TrueType для PDF. Текст кодируется номерами глифов (Identity-H),
+    поэтому доступны все символы шрифта, в том числе кириллица. В документ
+    встраивается подмножество шрифта из использованных глифов и таблица
+    ToUnicode, по которой текст извлекается обратно.
+    """
+
+    subset_tag = 'FOODGR'
+
+    def __init__(self, path):
+        try:
+            with open(path, 'rb') as file:
+                self.data = file.read()
+        except OSError as error:
+            raise ImproperlyConfigured(
+                f'Не найден шрифт для PDF: {path}, '
+                'см. SHOPPING_LIST_PDF_FONT.'
+            ) from error
+        font = TTFont(BytesIO(self.data), lazy=True)
+        scale = 1000 / font['head'].unitsPerEm
+        glyph_order = font.getGlyphOrder()
+        metrics = font['hmtx'].metrics
+        self.glyphs = {
+            code: font.getGlyphID(name)
+            for code, name in font.getBestCmap().items()
+        }
+        self.widths = {
+            gid: round(metrics[glyph_order[gid]][0] * scale)
+            for gid in {0, *self.glyphs.values()}
+        }
+        head = font['head']
+        self.bbox = ' '.join(
+            str(round(value * scale))
+            for value in (head.xMin, head.yMin, head.xMax, head.yMax)
+        )
+        self.ascent = round(font['hhea'].ascent * scale)
+        self.descent = round(font['hhea'].descent * scale)
+        self.cap_height = round(
+            getattr(font['OS/2'], 'sCapHeight', 0) * scale or self.ascent
+        )
+        name = font['name'].getDebugName(6) or 'Font'
+        self.name = f'{self.subset_tag}+' + ''.join(
+            char for char in name if char.isalnum() or char in '-_'
+        )
+
+    def encode(self, text, used):
+        """Строка PDF из номеров глифов; used копит глиф → символ."""
+        gids = []
+        for char in text:
+            gid = self.glyphs.get(ord(char), 0)
+            used.setdefault(gid, char)
+            gids.append(f'{gid:04X}')
+        return f'<{"".join(gids)}>'.encode()
+
+    def subset(self, gids):
+        """Файл шрифта только с глифами gids под прежними номерами."""
+        font = TTFont(BytesIO(self.data))
+        options = subset.Options()
+        options.retain_gids = True
+        options.notdef_outline = True
+        options.hinting = False
+        options.layout_features = []
+        options.drop_tables += ['FFTM']
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(gids=sorted(gids))
+        subsetter.subset(font)
+        buffer = BytesIO()
+        font.save(buffer)
+        return buffer.getvalue()
+
+    def widths_array(self, gids):
+        return ' '.join(
+            f'{gid} [{self.widths.get(gid, 0)}]' for gid in sorted(gids)
+        )
+
+    @staticmethod
+    def to_unicode(used):
+        """CMap ToUnicode: глиф → символ, блоками по 100 записей."""
+        pairs = [
+            f'<{gid:04X}> <{char.encode("utf-16-be").hex().upper()}>'
+            for gid, char in sorted(used.items()) if gid
+        ]
+        blocks = [
+            f'{len(pairs[start:start + 100])} beginbfchar\n'
+            + '\n'.join(pairs[start:start + 100]) + '\nendbfchar'
+            for start in range(0, len(pairs), 100)
+        ]
+        return '\n'.join([
+            '/CIDInit /ProcSet findresource begin',
+            '12 dict begin',
+            'begincmap',
+            '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) '
+            '/Supplement 0 >> def',
+            '/CMapName /Adobe-Identity-UCS def',
+            '/CMapType 2 def',
+            '1 begincodespacerange',
+            '<0000> <FFFF>',
+            'endcodespacerange',
+            *blocks,
+            'endcmap',
+            'CMapName currentdict /CMap defineresource pop',
+            'end',
+            'end',
+        ]).encode()
+
+
+@lru_cache(maxsize=None)
+def get_pdf_font(path):
+    return PDFFont(path)
+
+
+class PDFWriter:
+    """
+    Потоковый PDF: объекты отдаются по мере готовности страниц, в памяти
+    держится одна страница, смещения объектов для таблицы xref и набор
+    использованных глифов. Шрифт записывается последним, когда известно,
+    какие глифы встроить.
+    """
+
+    page_width, page_height = 595, 842
+    margin = 50
+    font_size = 12
+    title_size = 16
+    leading = 16
+    catalog_id, pages_id, font_id = 1, 2, 3
+
+    def __init__(self, font):
+        self.font = font
+        self.used = {}
+        self.offsets = {}
+        self.position = 0
+        self.page_ids = []
+        self.next_id = self.font_id + 1
+
+    def write(self, data):
+        self.position += len(data)
+        return data
+
+    def write_object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        return self.write(
+            f'{object_id} 0 obj\n'.encode() + body + b'\nendobj\n'
+        )
+
+    def write_stream(self, object_id, content, entries=''):
+        return self.write_object(
+            object_id,
+            f'<< /Length {len(content)}{entries} >>\nstream\n'.encode()
+            + content + b'\nendstream',
+        )
+
+    def allocate(self, count):
+        ids = range(self.next_id, self.next_id + count)
+        self.next_id += count
+        return ids
+
+    def render(self, lines):
+        yield self.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        per_page = (self.page_height - 2 * self.margin) // self.leading
+        page = [(TITLE, self.title_size)]
+        for line in lines:
+            if len(page) == per_page:
+                yield self.render_page(page)
+                page = []
+            page.append((line, self.font_size))
+        yield self.render_page(page)
+        yield self.render_font()
+        yield self.render_trailer()
+
+    def render_page(self, page):
+        commands = [
+            b'BT',
+            f'{self.margin} {self.page_height - self.margin} Td'.encode(),
+            f'{self.leading} TL'.encode(),
+        ]
+        for text, size in page:
+            commands.append(f'/F1 {size} Tf'.encode())
+            commands.append(self.font.encode(text, self.used) + b" '")
+        commands.append(b'ET')
+        content_id, page_id = self.allocate(2)
+        self.page_ids.append(page_id)
+        return self.write_stream(
+            content_id, b'\n'.join(commands)
+        ) + self.write_object(page_id, (
+            f'<< /Type /Page /Parent {self.pages_id} 0 R '
+            f'/MediaBox [0 0 {self.page_width} {self.page_height}] '
+            f'/Resources << /Font << /F1 {self.font_id} 0 R >> >> '
+            f'/Contents {content_id} 0 R >>'
+        ).encode())
+
+    def render_font(self):
+        font = self.font
+        cid_font_id, descriptor_id, file_id, unicode_id = self.allocate(4)
+        data = font.subset(self.used)
+        return b''.join([
+            self.write_object(self.font_id, (
+                f'<< /Type /Font /Subtype /Type0 /BaseFont /{font.name} '
+                f'/Encoding /Identity-H /DescendantFonts [{cid_font_id} 0 R] '
+                f'/ToUnicode {unicode_id} 0 R >>'
+            ).encode()),
+            self.write_object(cid_font_id, (
+                f'<< /Type /Font /Subtype /CIDFontType2 '
+                f'/BaseFont /{font.name} '
+                '/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) '
+                '/Supplement 0 >> '
+                f'/FontDescriptor {descriptor_id} 0 R /CIDToGIDMap /Identity '
+                f'/W [{font.widths_array(self.used)}] >>'
+            ).encode()),
+            self.write_object(descriptor_id, (
+                f'<< /Type /FontDescriptor /FontName /{font.name} '
+                f'/Flags 32 /FontBBox [{font.bbox}] /ItalicAngle 0 '
+                f'/Ascent {font.ascent} /Descent {font.descent} '
+                f'/CapHeight {font.cap_height} /StemV 80 '
+                f'/FontFile2 {file_id} 0 R >>'
+            ).encode()),
+            self.write_stream(
+                file_id, zlib.compress(data),
+                f' /Length1 {len(data)} /Filter /FlateDecode',
+            ),
+            self.write_stream(unicode_id, font.to_unicode(self.used)),
+        ])
+
+    def render_trailer(self):
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.page_ids)
+        chunks = [
+            self.write_object(self.pages_id, (
+                f'<< /Type /Pages /Kids [{kids}] '
+                f'/Count {len(self.page_ids)} >>'
+            ).encode()),
+            self.write_object(self.catalog_id, (
+                f'<< /Type /Catalog /Pages {self.pages_id} 0 R >>'
+            ).encode()),
+        ]
+        xref = self.position
+        size = self.next_id
+        table = [f'xref\n0 {size}\n0000000000 65535 f \n']
+        for object_id in range(1, size):
+            table.append(f'{self.offsets[object_id]:010d} 00000 n \n')
+        table.append(
+            f'trailer\n<< /Size {size} /Root {self.catalog_id} 0 R >>\n'
+            f'startxref\n{xref}\n%%EOF\n'
+        )
+        return b''.join(chunks) + ''.join(table).encode()
+
+
+def render_pdf(items):
+    """Шрифт загружается до первого байта ответа: его ошибка — это 500."""
+    writer = PDFWriter(get_pdf_font(settings.SHOPPING_LIST_PDF_FONT))
+    return writer.render(
+        f'{name} - {amount} {unit}' for name, unit, amount in items
+    )
+
+
+EXPORT_FORMATS = {
+    'txt': (render_txt, 'text/plain'),
+    'csv': (render_csv, 'text/csv'),
+    'pdf': (render_pdf, 'application/pdf'),
+}
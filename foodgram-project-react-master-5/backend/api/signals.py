@@ -0,0 +1,298 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+
+from api.catalog import tag_catalog
+from api.search.ingredients import ingredient_index
+from api.search.recipe_ingredients import (VERSION as RECIPE_INGREDIENTS,
+                                           recipe_ingredient_index)
+from api.shopping_list import (change_shopping_list, get_cart_user_ids,
+                               refresh_shopping_lists)
+from api.versions import bump_version
+from recipes.images import image_processed
+from recipes.models import (Favorite, Ingredient, Recipe, Recipebook,
+                            RecipeTags, ShoppingCart, Tag)
+from users.models import Subscription
+
+User = get_user_model()
+
+WRITE_SIGNALS = (('save', post_save), ('delete', post_delete))
+# Поля автора в теле рецепта.
+AUTHOR_FIELDS = {'username', 'first_name', 'last_name', 'email'}
+
+
+def bump_on_commit(name, instance=None, **kwargs):
+    """
+    Сбрасывает версию после фиксации транзакции.
+    name может быть функцией, вычисляющей имя версии по объекту.
+    """
+    if callable(name):
+        name = name(instance)
+    transaction.on_commit(partial(bump_version, name))
+
+
+def connect_version(name, *models, uid=None):
+    """Сбрасывает версию name после любой записи в таблицы models."""
+    receiver = partial(bump_on_commit, name)
+    for model in models:
+        for signal_name, signal in WRITE_SIGNALS:
+            signal.connect(
+                receiver, sender=model, weak=False,
+                dispatch_uid=(
+                    f'{uid or name}:{signal_name}:{model._meta.label}'
+                ),
+            )
+
+
+def bump_recipes_on_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """Изменения тегов и ингредиентов рецепта через менеджеры m2m."""
+    if not action.startswith('post_'):
+        return
+    bump_on_commit('recipes')
+    if not reverse:
+        bump_on_commit(f'recipe:{instance.pk}')
+    elif pk_set is None:
+        bump_on_commit(
+            'tags' if sender is Recipe.tags.through else 'ingredients'
+        )
+    else:
+        for recipe_id in pk_set:
+            bump_on_commit(f'recipe:{recipe_id}')
+
+
+def touch_recipes(**filters):
+    """
+    Увеличивает версию рецептов в той же транзакции, что и запись данных
+    их выдачи: по версии проверяются закэшированные тела рецептов.
+    """
+    Recipe.objects.filter(**filters).update(version=F('version') + 1)
+
+
+def touch_recipe(sender, instance, created=False, **kwargs):
+    """Новый рецепт ещё не попадал в кэш, его версию не трогаем."""
+    if sender is Recipe:
+        if not created:
+            touch_recipes(pk=instance.pk)
+    else:
+        touch_recipes(pk=instance.recipe_id)
+
+
+def touch_recipes_of(sender, instance, created=False, update_fields=None,
+                     **kwargs):
+    """Изменены автор, тег или ингредиент, показанные в рецептах."""
+    if created or kwargs.get('raw'):
+        return
+    if sender is User:
+        if update_fields is not None and not (
+            set(update_fields) & AUTHOR_FIELDS
+        ):
+            return
+        touch_recipes(author=instance)
+    elif sender is Tag:
+        touch_recipes(tags=instance)
+    else:
+        touch_recipes(ingredients=instance)
+
+
+def touch_recipes_on_m2m(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """
+    Теги и ингредиенты изменены через менеджеры m2m. При очистке со
+    стороны тега или ингредиента рецепты известны только до неё.
+    """
+    if reverse and action == 'pre_clear':
+        field = 'tags' if sender is Recipe.tags.through else 'ingredients'
+        touch_recipes(**{field: instance})
+    elif action not in ('post_add', 'post_remove'):
+        return
+    elif not reverse:
+        touch_recipes(pk=instance.pk)
+    elif pk_set:
+        touch_recipes(pk__in=pk_set)
+
+
+def expire_tag_catalog(sender, instance, **kwargs):
+    """Записи в Tag этого процесса видны сразу, не со следующего запроса."""
+    transaction.on_commit(tag_catalog.expire)
+
+
+def update_ingredient_index(sender, instance, created=None, **kwargs):
+    """Точечное обновление индекса поиска ингредиентов."""
+    if created is None:
+        change = partial(ingredient_index.apply, deleted=[instance.pk])
+    else:
+        change = partial(ingredient_index.apply, changed=[{
+            'id': instance.pk,
+            'name': instance.name,
+            'measurement_unit': instance.measurement_unit,
+            'version': instance.version,
+        }], created=int(created))
+    transaction.on_commit(change)
+
+
+def update_recipe_ingredient_index(recipe_ids=None):
+    """
+    Сбрасывает версию индекса ингредиентов рецептов после фиксации и
+    точечно обновляет индекс этого процесса. Без recipe_ids индекс
+    перечитывается целиком при следующем поиске.
+    """
+    def update():
+        bump_version(RECIPE_INGREDIENTS)
+        if recipe_ids is not None:
+            recipe_ingredient_index.apply(recipe_ids)
+    transaction.on_commit(update)
+
+
+def update_recipe_ingredients(sender, instance, **kwargs):
+    """Рецепт или строка его ингредиентов сохранены либо удалены."""
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    update_recipe_ingredient_index([recipe_id])
+
+
+def update_recipe_ingredients_on_m2m(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    """Ингредиенты изменены через менеджер m2m."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_recipe_ingredient_index([instance.pk])
+    else:
+        update_recipe_ingredient_index(pk_set and list(pk_set))
+
+
+def update_shopping_list(sender, instance, created=False, **kwargs):
+    """Рецепт добавлен в корзину или убран из неё."""
+    if created or kwargs['signal'] is post_delete:
+        change_shopping_list(instance.user_id, instance.recipe_id, created)
+
+
+def remember_recipebook(sender, instance, raw=False, **kwargs):
+    """Прежний ингредиент строки, чтобы пересчитать и его сумму."""
+    instance.previous_ingredient_id = None
+    if instance.pk and not raw:
+        instance.previous_ingredient_id = Recipebook.objects.filter(
+            pk=instance.pk
+        ).values_list('ingredient_id', flat=True).first()
+
+
+def refresh_shopping_lists_on_recipebook(sender, instance, **kwargs):
+    """
+    Изменены ингредиенты рецепта, который может лежать в корзинах.
+    Корзины читаются сразу, пока каскадное удаление рецепта их не убрало,
+    а суммы пересчитываются после фиксации транзакции.
+    """
+    user_ids = get_cart_user_ids(instance.recipe_id)
+    if user_ids:
+        transaction.on_commit(partial(
+            refresh_shopping_lists, user_ids, {
+                instance.ingredient_id,
+                getattr(instance, 'previous_ingredient_id', None),
+            } - {None},
+        ))
+
+
+def bump_on_image_processed(sender, recipe_id, **kwargs):
+    """Статус картинки входит в выдачу рецепта."""
+    bump_on_commit('recipes')
+    bump_on_commit(f'recipe:{recipe_id}')
+
+
+def recipe_version(instance):
+    return f'recipe:{instance.pk}'
+
+
+def recipe_relation_version(instance):
+    return f'recipe:{instance.recipe_id}'
+
+
+def user_version(instance):
+    return f'user:{instance.pk}'
+
+
+def relations_version(instance):
+    """Избранное, корзина и подписки конкретного пользователя."""
+    if isinstance(instance, Subscription):
+        return f'relations:{instance.follower_id}'
+    return f'relations:{instance.user_id}'
+
+
+connect_version(
+    'recipes', Recipe, Favorite, ShoppingCart, RecipeTags, Recipebook
+)
+connect_version(recipe_version, Recipe, uid='recipe')
+connect_version(
+    recipe_relation_version, Recipebook, RecipeTags, uid='recipe-relation'
+)
+connect_version('tags', Tag)
+request_started.connect(tag_catalog.expire, dispatch_uid='tag-catalog')
+for signal_name, signal in WRITE_SIGNALS:
+    signal.connect(
+        expire_tag_catalog, sender=Tag,
+        dispatch_uid=f'tag-catalog:{signal_name}',
+    )
+connect_version('ingredients', Ingredient)
+for signal_name, signal in WRITE_SIGNALS:
+    signal.connect(
+        update_ingredient_index, sender=Ingredient,
+        dispatch_uid=f'ingredient-index:{signal_name}',
+    )
+connect_version(user_version, User, uid='user')
+connect_version(
+    relations_version, Favorite, ShoppingCart, Subscription, uid='relations'
+)
+for signal_name, signal in WRITE_SIGNALS:
+    signal.connect(
+        update_shopping_list, sender=ShoppingCart,
+        dispatch_uid=f'shopping-list:{signal_name}',
+    )
+    signal.connect(
+        refresh_shopping_lists_on_recipebook, sender=Recipebook,
+        dispatch_uid=f'shopping-list:recipebook:{signal_name}',
+    )
+for signal_name, signal in WRITE_SIGNALS:
+    for model in (Recipe, Recipebook):
+        signal.connect(
+            update_recipe_ingredients, sender=model,
+            dispatch_uid=(
+                f'recipe-ingredients:{signal_name}:{model._meta.label}'
+            ),
+        )
+m2m_changed.connect(
+    update_recipe_ingredients_on_m2m, sender=Recipe.ingredients.through,
+    dispatch_uid='recipe-ingredients:m2m',
+)
+image_processed.connect(
+    bump_on_image_processed, dispatch_uid='recipes:image-processed'
+)
+pre_save.connect(
+    remember_recipebook, sender=Recipebook,
+    dispatch_uid='shopping-list:recipebook:pre_save',
+)
+for through in (Recipe.tags.through, Recipe.ingredients.through):
+    m2m_changed.connect(
+        bump_recipes_on_m2m, sender=through,
+        dispatch_uid=f'recipes:m2m:{through._meta.label}',
+    )
+    m2m_changed.connect(
+        touch_recipes_on_m2m, sender=through,
+        dispatch_uid=f'recipe-version:m2m:{through._meta.label}',
+    )
+post_save.connect(
+    touch_recipe, sender=Recipe, dispatch_uid='recipe-version:recipe'
+)
+for signal_name, signal in WRITE_SIGNALS:
+    for model in (Recipebook, RecipeTags):
+        signal.connect(
+            touch_recipe, sender=model,
+            dispatch_uid=f'recipe-version:{signal_name}:{model._meta.label}',
+        )
+for model in (User, Tag, Ingredient):
+    post_save.connect(
+        touch_recipes_of, sender=model,
+        dispatch_uid=f'recipe-version:{model._meta.label}',
+    )
@@ -0,0 +1,74 @@
+from time import sleep
+
+from django.test import TestCase
+
+from api.tests.utils import create_ingredients, create_tags
+from recipes.models import Ingredient, Tag, current_stamp
+
+
+class TagCatalogTest(TestCase):
+    """
+    Каталог тегов перечитывается по состоянию таблицы. Записи идут
+    мимо сигналов, как из другого процесса или команды.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = create_tags(2)
+
+    def get_names(self):
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        return [tag['name'] for tag in response.json()]
+
+    def test_update(self):
+        self.assertEqual(self.get_names(), ['Тег 0', 'Тег 1'])
+        Tag.objects.filter(pk=self.tags[0].pk).update(
+            name='Завтрак', version=current_stamp() + 1
+        )
+        self.assertEqual(self.get_names(), ['Завтрак', 'Тег 1'])
+
+    def test_create_and_delete(self):
+        self.get_names()
+        Tag.objects.bulk_create([
+            Tag(name='Ужин', color='#0000FF', slug='dinner'),
+        ])
+        self.assertEqual(self.get_names(), ['Тег 0', 'Тег 1', 'Ужин'])
+        Tag.objects.filter(pk=self.tags[1].pk)._raw_delete('default')
+        self.assertEqual(self.get_names(), ['Тег 0', 'Ужин'])
+
+
+class IngredientChangesTest(TestCase):
+    """Выгрузка изменений каталога ингредиентов сообщает и об удалениях."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ingredients = create_ingredients(3)
+
+    def get_snapshot(self, **params):
+        response = self.client.get('/api/ingredients/snapshot/', params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_delete_and_add(self):
+        snapshot = self.get_snapshot()
+        version = snapshot.json()['version']
+        # Метки в миллисекундах: следующие записи должны быть позже.
+        sleep(0.002)
+        deleted = [ingredient.id for ingredient in self.ingredients[:2]]
+        Ingredient.objects.get(pk=deleted[0]).delete()
+        Ingredient.objects.filter(pk=deleted[1]).delete()
+        added = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        self.assertNotEqual(
+            self.get_snapshot().headers['ETag'], snapshot.headers['ETag']
+        )
+        changes = self.get_snapshot(since_version=version).json()
+        self.assertEqual(changes['count'], 2)
+        self.assertEqual(
+            [row['id'] for row in changes['ingredients']], [added.id]
+        )
+        self.assertCountEqual(changes['deleted'], deleted)
+        self.assertGreater(changes['version'], version)
+        changes = self.get_snapshot(since_version=changes['version']).json()
+        self.assertEqual(changes['ingredients'], [])
+        self.assertEqual(changes['deleted'], [])
@@ -0,0 +1,39 @@
+from django.test import SimpleTestCase, override_settings
+
+from api.checks import check_pdf_font, check_shared_cache
+
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    """Кэш в памяти процесса допускается только при DEBUG."""
+
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES=LOCMEM, DEBUG=False)
+    def test_process_local_cache(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ['api.E001']
+        )
+
+    @override_settings(CACHES=LOCMEM, DEBUG=True)
+    def test_process_local_cache_in_debug(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ['api.W001']
+        )
+
+
+class PDFFontCheckTest(SimpleTestCase):
+
+    @override_settings(SHOPPING_LIST_PDF_FONT=__file__)
+    def test_font_found(self):
+        self.assertEqual(check_pdf_font(None), [])
+
+    @override_settings(SHOPPING_LIST_PDF_FONT='/nonexistent/font.ttf')
+    def test_font_missing(self):
+        self.assertEqual(
+            [error.id for error in check_pdf_font(None)], ['api.W002']
+        )
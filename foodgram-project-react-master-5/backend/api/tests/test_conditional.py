@@ -0,0 +1,62 @@
+from django.test import TestCase
+
+from api.tests.utils import (MediaRootMixin, create_recipe, create_user,
+                             get_client)
+
+
+class ConditionalGetTest(MediaRootMixin, TestCase):
+    """ETag выдачи рецептов зависит только от показанных данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user(0)
+        cls.author = create_user(1)
+        cls.recipe = create_recipe(cls.author, 0)
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.reader)
+
+    def get(self, path, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(path, **headers)
+
+    def check_etag(self, path, change, changes_etag):
+        response = self.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response.headers)
+        etag = response.headers['ETag']
+        self.assertEqual(self.get(path, etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.get(path, etag)
+        self.assertEqual(response.status_code, 200 if changes_etag else 304)
+
+    def rename(self, user):
+        def change():
+            user.first_name = 'Другое'
+            user.save()
+        return change
+
+    def test_list_ignores_other_users(self):
+        self.check_etag(
+            '/api/recipes/', self.rename(create_user(2)), changes_etag=False
+        )
+
+    def test_list_follows_page_authors(self):
+        self.check_etag(
+            '/api/recipes/', self.rename(self.author), changes_etag=True
+        )
+
+    def test_retrieve_follows_author(self):
+        self.check_etag(
+            f'/api/recipes/{self.recipe.id}/', self.rename(self.author),
+            changes_etag=True,
+        )
+
+    def test_tags(self):
+        response = self.get('/api/tags/')
+        self.assertNotIn('Last-Modified', response.headers)
+        self.assertEqual(
+            self.get('/api/tags/', response.headers['ETag']).status_code, 304
+        )
@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from api.tests.utils import (MediaRootMixin, create_recipe, create_user,
+                             get_client, subscribe)
+from recipes.counters import COUNTERS
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+
+class CountersTest(MediaRootMixin, TestCase):
+    """Денормализованные счётчики при записи строк и их сверка."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.readers = [create_user(number) for number in range(1, 4)]
+        cls.recipe = create_recipe(cls.author, 0)
+
+    def assertCounts(self, obj, **counts):
+        obj = type(obj).objects.get(pk=obj.pk)
+        self.assertEqual(
+            {field: getattr(obj, field) for field in counts}, counts
+        )
+
+    def test_recipes_count(self):
+        self.assertCounts(self.author, recipes_count=1)
+        recipe = create_recipe(self.author, 1)
+        self.assertCounts(self.author, recipes_count=2)
+        recipe.author = self.readers[0]
+        recipe.save()
+        self.assertCounts(self.author, recipes_count=1)
+        self.assertCounts(self.readers[0], recipes_count=1)
+        recipe.delete()
+        self.assertCounts(self.readers[0], recipes_count=0)
+
+    def test_followers_count(self):
+        for reader in self.readers:
+            subscribe(reader, self.author)
+        self.assertCounts(self.author, followers_count=3)
+        Subscription.objects.filter(follower=self.readers[0]).delete()
+        self.assertCounts(self.author, followers_count=2)
+        self.readers[1].delete()
+        self.assertCounts(self.author, followers_count=1)
+
+    def test_recipe_counts(self):
+        for model, field in (
+            (Favorite, 'favorites_count'),
+            (ShoppingCart, 'shopping_carts_count'),
+        ):
+            with self.subTest(field=field):
+                for reader in self.readers:
+                    model.objects.create(user=reader, recipe=self.recipe)
+                self.assertCounts(self.recipe, **{field: 3})
+                model.objects.filter(user=self.readers[0]).delete()
+                self.assertCounts(self.recipe, **{field: 2})
+                model.objects.filter(recipe=self.recipe).delete()
+                self.assertCounts(self.recipe, **{field: 0})
+
+    def test_api(self):
+        client = get_client(self.readers[0])
+        for path, field in (
+            ('favorite', 'favorites_count'),
+            ('shopping_cart', 'shopping_carts_count'),
+        ):
+            with self.subTest(path=path):
+                url = f'/api/recipes/{self.recipe.id}/{path}/'
+                self.assertEqual(client.post(url).status_code, 201)
+                self.assertCounts(self.recipe, **{field: 1})
+                self.assertEqual(client.delete(url).status_code, 204)
+                self.assertCounts(self.recipe, **{field: 0})
+
+    def test_save_keeps_counters(self):
+        stale = User.objects.get(pk=self.author.pk)
+        subscribe(self.readers[0], self.author)
+        stale.first_name = 'Другое'
+        stale.save()
+        self.assertCounts(self.author, followers_count=1, recipes_count=1)
+
+    def test_never_negative(self):
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=0)
+        Favorite.objects.bulk_create([
+            Favorite(user=self.readers[0], recipe=self.recipe),
+        ])
+        Favorite.objects.all().delete()
+        self.assertCounts(self.recipe, favorites_count=0)
+
+    def test_reconcile(self):
+        subscribe(self.readers[0], self.author)
+        Favorite.objects.create(user=self.readers[0], recipe=self.recipe)
+        User.objects.filter(pk=self.author.pk).update(
+            recipes_count=5, followers_count=0
+        )
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            favorites_count=2, shopping_carts_count=1
+        )
+        self.assertEqual(
+            {str(counter): counter.drifted().count() for counter in COUNTERS},
+            {
+                'users.User.recipes_count': 1,
+                'users.User.followers_count': 1,
+                'recipes.Recipe.favorites_count': 1,
+                'recipes.Recipe.shopping_carts_count': 1,
+            },
+        )
+        with self.assertRaisesMessage(CommandError, 'Расхождений: 4.'):
+            call_command('reconcile_counters', verify=True, stdout=StringIO())
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertCounts(self.author, recipes_count=1, followers_count=1)
+        self.assertCounts(
+            self.recipe, favorites_count=1, shopping_carts_count=0
+        )
+        call_command('reconcile_counters', verify=True, stdout=StringIO())
@@ -0,0 +1,110 @@
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.preloaders import get_top_recipes, group_by_author
+from api.recipe_cache import recipe_bodies, recipe_body_queryset
+from api.serializers.fast import (get_plan, render_recipe_bodies,
+                                  render_short_recipes, render_subscriptions)
+from api.serializers.recipes import (RecipeReadSerializer,
+                                     ShortRecipeSerializer)
+from api.serializers.users import SubscriptionSerializer
+from api.tests.utils import (MediaRootMixin, create_ingredients,
+                             create_recipe, create_tags, create_user,
+                             get_client, subscribe)
+from recipes.models import Recipe
+from users.models import User
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class FastSerializersTest(MediaRootMixin, TestCase):
+    """Быстрый путь чтения отдаёт те же байты, что и сериализаторы DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.follower = create_user(0)
+        cls.authors = [create_user(number) for number in range(1, 4)]
+        tags = create_tags()
+        ingredients = create_ingredients()
+        for index, author in enumerate(cls.authors[:2]):
+            for number in range(3):
+                create_recipe(
+                    author, number,
+                    tags=tags[:number + 1],
+                    ingredients=ingredients[index + number:][:number + 2],
+                )
+        Recipe.objects.filter(pk=Recipe.objects.earliest('id').pk).update(
+            image_status=Recipe.ImageStatus.PENDING
+        )
+        for author in cls.authors:
+            subscribe(cls.follower, author)
+        cls.recipe_ids = list(
+            Recipe.objects.order_by('id').values_list('id', flat=True)
+        )
+
+    def get_request(self):
+        return Request(APIRequestFactory().get('/api/recipes/'))
+
+    def test_recipe_bodies(self):
+        fast = render_recipe_bodies(self.recipe_ids)
+        slow = sorted(
+            RecipeReadSerializer(
+                recipe_body_queryset().filter(id__in=self.recipe_ids),
+                many=True,
+            ).data,
+            key=lambda recipe: recipe['id'],
+        )
+        self.assertEqual(render(fast), render(slow))
+        for field in ('tags', 'ingredients', 'images', 'image_status'):
+            self.assertIn(field, fast[0])
+        self.assertEqual(fast[0]['image_status'], 'pending')
+
+    def test_short_recipes(self):
+        request = self.get_request()
+        recipes = Recipe.objects.order_by('id')
+        fast = render_short_recipes(
+            recipes.values(*get_plan(ShortRecipeSerializer).value_keys),
+            request,
+        )
+        slow = ShortRecipeSerializer(
+            recipes, many=True, context={'request': request}
+        ).data
+        self.assertEqual(render(fast), render(slow))
+
+    def test_subscriptions(self):
+        request = self.get_request()
+        authors = list(User.objects.filter(bloger__follower=self.follower))
+        for recipes_limit in (None, 0, 1, 5):
+            with self.subTest(recipes_limit=recipes_limit):
+                fast = render_subscriptions(authors, request, recipes_limit)
+                slow = SubscriptionSerializer(authors, many=True, context={
+                    'request': request,
+                    'is_subscription_request': True,
+                    'author_recipes': group_by_author(get_top_recipes(
+                        [author.id for author in authors], recipes_limit
+                    )),
+                }).data
+                self.assertEqual(render(fast), render(slow))
+
+    def test_endpoints(self):
+        client = get_client(self.follower)
+        urls = (
+            '/api/recipes/?limit=100',
+            f'/api/recipes/{self.recipe_ids[0]}/',
+            '/api/users/subscriptions/?recipes_limit=2',
+            '/api/users/subscriptions/',
+        )
+        for url in urls:
+            responses = []
+            for fast in (True, False):
+                recipe_bodies.clear()
+                with override_settings(FAST_READ_SERIALIZERS=fast):
+                    response = client.get(url, HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, 200, url)
+                responses.append(response.content)
+            with self.subTest(url=url):
+                self.assertEqual(*responses)
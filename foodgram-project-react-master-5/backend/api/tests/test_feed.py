@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from api.tests.utils import (MediaRootMixin, create_ingredients,
+                             create_recipe, create_tags, create_user,
+                             get_client, recipe_payload, subscribe)
+from recipes.feed import rebuild_feeds
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscription
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+class FeedTest(MediaRootMixin, TestCase):
+    """Лента подписок при переходе автора через порог раскладки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user(0)
+        cls.other_reader = create_user(1)
+        cls.author = create_user(2)
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.reader)
+
+    def feed_ids(self):
+        response = self.client.get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def write_recipe(self, number):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_recipe(self.author, number)
+
+    def test_recipes_survive_drop_under_limit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            subscribe(self.reader, self.author)
+        fanned_out = self.write_recipe(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = subscribe(self.other_reader, self.author)
+        merged = self.write_recipe(1)
+        self.assertFalse(
+            FeedEntry.objects.filter(recipe_id=merged.id).exists()
+        )
+        self.assertEqual(self.feed_ids(), [merged.id, fanned_out.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.delete()
+        fanned_out_again = self.write_recipe(2)
+        self.assertEqual(
+            self.feed_ids(),
+            [fanned_out_again.id, merged.id, fanned_out.id],
+        )
+
+    def test_new_follower_gets_all_recipes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            subscribe(self.other_reader, self.author)
+            subscribe(self.reader, self.author)
+        merged = self.write_recipe(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.filter(
+                follower=self.reader, author=self.author
+            ).delete()
+        fanned_out = self.write_recipe(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            subscribe(self.reader, self.author)
+        expected = [fanned_out.id, merged.id]
+        self.assertEqual(self.feed_ids(), expected)
+        rebuild_feeds()
+        self.assertEqual(self.feed_ids(), expected)
+
+    @override_settings(FEED_LENGTH=2)
+    def test_trim_by_pub_date(self):
+        """Старые рецепты с большими id не вытесняют новые из ленты."""
+        with self.captureOnCommitCallbacks(execute=True):
+            subscribe(self.reader, self.author)
+        recipes = [self.write_recipe(number) for number in range(2)]
+        importer = create_user(3)
+        imported = [create_recipe(importer, number) for number in range(2, 4)]
+        Recipe.objects.filter(author=importer).update(
+            pub_date=recipes[0].pub_date - timedelta(days=1)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            subscribe(self.reader, importer)
+        expected = [recipes[1].id, recipes[0].id]
+        self.assertEqual(self.feed_ids(), expected)
+        self.assertFalse(FeedEntry.objects.filter(
+            recipe__in=imported
+        ).exists())
+        rebuild_feeds()
+        self.assertEqual(self.feed_ids(), expected)
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+class FeedApiTest(MediaRootMixin, TransactionTestCase):
+    """
+    Рецепт, созданный через API вне транзакции: раскладка по лентам
+    выполняется сразу после INSERT, до остальных записей сериализатора.
+    """
+
+    def test_recipe_over_limit_reaches_feeds(self):
+        reader = create_user(0)
+        author = create_user(1)
+        subscribe(reader, author)
+        subscribe(create_user(2), author)
+        response = get_client(author).post(
+            '/api/recipes/',
+            recipe_payload('Суп', create_tags(1), create_ingredients(2)),
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        recipe_id = response.json()['id']
+        self.assertTrue(Recipe.objects.get(pk=recipe_id).feed_merged)
+        response = get_client(reader).get('/api/recipes/feed/')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            [recipe_id],
+        )
@@ -0,0 +1,46 @@
+from django.test import TestCase, override_settings
+
+from api.tests.utils import MediaRootMixin, create_user, image_file
+from recipes.images import process_image
+from recipes.models import Recipe
+
+LARGE = (900, 700)
+
+
+class RecipeImageTest(MediaRootMixin, TestCase):
+    """Сохранение рецепта не затирает результат обработки картинки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+
+    @override_settings(IMAGE_PROCESSING_SYNC=False)
+    def create_pending_recipe(self):
+        recipe = Recipe.objects.create(
+            author=self.author, name='Пирог', text='Описание',
+            cooking_time=5, image=image_file(size=LARGE),
+        )
+        self.assertEqual(recipe.image_status, Recipe.ImageStatus.PENDING)
+        return recipe
+
+    def test_save_keeps_processed_image(self):
+        recipe = self.create_pending_recipe()
+        stale = Recipe.objects.get(pk=recipe.pk)
+        original = stale.image.name
+        process_image(Recipe, recipe.pk, original)
+        stale.name = 'Пирог с вишней'
+        stale.save()
+        saved = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(saved.name, 'Пирог с вишней')
+        self.assertEqual(saved.image_status, Recipe.ImageStatus.READY)
+        self.assertNotEqual(saved.image.name, original)
+
+    def test_new_image_is_written(self):
+        recipe = self.create_pending_recipe()
+        process_image(Recipe, recipe.pk, recipe.image.name)
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        recipe.image = image_file(color=(10, 20, 30))
+        recipe.save()
+        saved = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(saved.image.name, recipe.image.name)
+        self.assertEqual(saved.image_status, Recipe.ImageStatus.READY)
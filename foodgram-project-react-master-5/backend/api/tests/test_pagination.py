@@ -0,0 +1,159 @@
+from base64 import urlsafe_b64encode
+from types import SimpleNamespace
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.counting import ESTIMATED, QuerysetCounter
+from api.pagination import CountedPaginator, LimitPageNumberPagination
+from api.tests.utils import (MediaRootMixin, create_recipe, create_user,
+                             get_client, subscribe)
+from recipes.models import Recipe
+from users.models import User
+
+
+def get_cursor(url):
+    return parse_qs(urlparse(url).query)['cursor'][0]
+
+
+class PaginationTest(MediaRootMixin, TestCase):
+    """Страницы по номеру и по курсору."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user(0)
+        authors = [create_user(number) for number in range(1, 4)]
+        cls.recipes = [
+            create_recipe(author, number)
+            for author in authors for number in range(3)
+        ]
+        # Половина рецептов с одной датой: порядок решает id.
+        Recipe.objects.filter(
+            pk__in=[recipe.pk for recipe in cls.recipes[::2]]
+        ).update(pub_date=cls.recipes[0].pub_date)
+        for author in reversed(authors):
+            subscribe(cls.reader, author)
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.reader)
+
+    def walk(self, path, params):
+        """id со всех страниц курсора, по ссылкам next."""
+        ids = []
+        params = {**params, 'cursor': ''}
+        while True:
+            response = self.client.get(path, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertNotIn('count', data)
+            self.assertIsNone(data['previous'])
+            ids += [row['id'] for row in data['results']]
+            if data['next'] is None:
+                return ids
+            params['cursor'] = get_cursor(data['next'])
+
+    def test_recipes_cursor(self):
+        expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True))
+        for limit in (1, 2, 4, 9, 20):
+            with self.subTest(limit=limit):
+                self.assertEqual(
+                    self.walk('/api/recipes/', {'limit': limit}), expected
+                )
+
+    def test_subscriptions_cursor(self):
+        expected = list(User.objects.filter(
+            bloger__follower=self.reader
+        ).order_by('username', 'id').values_list('id', flat=True))
+        self.assertEqual(
+            self.walk('/api/users/subscriptions/', {'limit': 2}), expected
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in (
+            'не курсор', 'e30=',
+            urlsafe_b64encode(b'["2020-01-01T00:00:00"]').decode(),
+            urlsafe_b64encode(b'["not a date", 1]').decode(),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    '/api/recipes/', {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_page_number(self):
+        response = self.client.get('/api/recipes/', {'limit': 4, 'page': 3})
+        data = response.json()
+        self.assertEqual(data['count'], len(self.recipes))
+        self.assertNotIn('count_exact', data)
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next'])
+
+    @override_settings(
+        PAGINATION_COUNT_STRATEGY=ESTIMATED,
+        PAGINATION_COUNT_ESTIMATE_THRESHOLD=5,
+    )
+    def test_estimated_count(self):
+        with patch.object(QuerysetCounter, 'estimate', return_value=100):
+            data = self.client.get('/api/recipes/').json()
+        self.assertEqual(data['count'], 100)
+        self.assertIs(data['count_exact'], False)
+
+    def test_mixed_directions(self):
+        """Ключ с разными направлениями сортировки полей."""
+        ordering = ('-pub_date', 'id')
+        view = SimpleNamespace(keyset_ordering=ordering, cursor_only=True)
+        factory = APIRequestFactory()
+        ids = []
+        cursor = ''
+        while cursor is not None:
+            paginator = LimitPageNumberPagination()
+            request = Request(factory.get(
+                '/api/recipes/', {'limit': 2, 'cursor': cursor}
+            ))
+            ids += [recipe.id for recipe in paginator.paginate_queryset(
+                Recipe.objects.all(), request, view
+            )]
+            link = paginator.get_next_cursor_link()
+            cursor = link and get_cursor(link)
+        self.assertEqual(ids, list(Recipe.objects.order_by(
+            *ordering
+        ).values_list('id', flat=True)))
+        paginator = LimitPageNumberPagination()
+        with self.assertRaises(NotFound):
+            paginator.paginate_queryset(
+                Recipe.objects.all(),
+                Request(factory.get('/', {'cursor': 'e30='})), view,
+            )
+
+
+class CountedPaginatorTest(TestCase):
+
+    def test_list(self):
+        paginator = CountedPaginator(
+            list(range(7)), 3, counter=QuerysetCounter()
+        )
+        self.assertEqual(paginator.count, 7)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertTrue(paginator.count_exact)
+
+    def test_queryset(self):
+        for count, exact in ((1, True), (500, False)):
+            with self.subTest(exact=exact):
+                counter = QuerysetCounter()
+                with patch.object(
+                    counter, 'count', return_value=(count, exact)
+                ) as count_mock:
+                    paginator = CountedPaginator(
+                        Recipe.objects.all(), 10, counter=counter
+                    )
+                    self.assertEqual(paginator.count, count)
+                    self.assertEqual(paginator.count, count)
+                count_mock.assert_called_once()
+                self.assertIs(paginator.count_exact, exact)
@@ -0,0 +1,72 @@
+from django.test import TestCase
+
+from api.tests.utils import (MediaRootMixin, create_ingredients,
+                             create_recipe, create_tags, create_user,
+                             get_client)
+from recipes.models import Recipebook
+
+
+class RecipeBodyCacheTest(MediaRootMixin, TestCase):
+    """
+    Тела рецептов обновляются по версии из строки рецепта. Колбэки
+    после фиксации не выполняются: так выглядит запись из другого
+    процесса, чьи сбросы версий в кэше этот процесс мог не увидеть.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.ingredients = create_ingredients(2)
+        cls.recipe = create_recipe(
+            cls.author, 0, create_tags(1), cls.ingredients
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.author)
+
+    def get_recipe(self):
+        response = self.client.get(f'/api/recipes/{self.recipe.id}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get_ingredient(self, data):
+        return next(
+            row for row in data['ingredients']
+            if row['id'] == self.ingredients[0].id
+        )
+
+    def check_change(self, change, read):
+        self.get_recipe()
+        with self.captureOnCommitCallbacks():
+            expected = change()
+        self.assertEqual(read(self.get_recipe()), expected)
+
+    def test_author_rename(self):
+        def change():
+            self.author.first_name = 'Другое'
+            self.author.save()
+            return 'Другое'
+        self.check_change(change, lambda data: data['author']['first_name'])
+
+    def test_ingredient_rename(self):
+        def change():
+            ingredient = self.ingredients[0]
+            ingredient.name = 'Мука'
+            ingredient.save()
+            return 'Мука'
+        self.check_change(
+            change, lambda data: self.get_ingredient(data)['name']
+        )
+
+    def test_amount_edit(self):
+        def change():
+            row = Recipebook.objects.get(
+                recipe=self.recipe, ingredient=self.ingredients[0]
+            )
+            row.amount = 50
+            row.save()
+            return 50
+        self.check_change(
+            change, lambda data: self.get_ingredient(data)['amount']
+        )
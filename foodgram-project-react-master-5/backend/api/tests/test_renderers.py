@@ -0,0 +1,48 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, JSONFragment
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    """FastJSONRenderer кодирует данные байт в байт как JSONRenderer."""
+
+    def test_same_bytes(self):
+        moment = datetime.datetime(
+            2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+        )
+        data = {
+            'datetime': moment,
+            'naive': moment.replace(tzinfo=None, microsecond=0),
+            'local': timezone.localtime(moment),
+            'date': moment.date(),
+            'time': moment.time(),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'decimal': Decimal('1.50'),
+            'float': 0.1,
+            'text': 'Щи да каша',
+            'nested': [{'id': 1, 'image': None}, (2, 3)],
+        }
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_non_finite_floats_rejected(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value):
+                data = {'items': [{'score': value}]}
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render(data)
+
+    def test_fragments(self):
+        fragment = JSONFragment(FastJSONRenderer().render({'id': 1}))
+        self.assertEqual(
+            FastJSONRenderer().render([fragment, None]), b'[{"id":1},null]'
+        )
@@ -0,0 +1,145 @@
+import json
+from importlib import import_module
+from itertools import product
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+from api.search.ingredients import ingredient_index
+from api.tests.utils import (MediaRootMixin, create_recipe, create_user,
+                             get_client)
+from recipes import search
+from recipes.models import Ingredient, Recipe, current_stamp
+
+# Основы и окончания разных частей речи для словоформ корпуса.
+STEMS = ('жарен', 'варен', 'пек', 'нарез', 'слив', 'готов', 'печень')
+ENDINGS = (
+    '', 'а', 'ая', 'ое', 'ые', 'ого', 'ыми', 'ешь', 'ете', 'ить', 'ился',
+    'ившись', 'ующий', 'ейший', 'ость', 'ости', 'ями', 'ах', 'ию', 'ь',
+    'нн', 'нный', 'ённые', 'ейше',
+)
+
+
+class RecipeSearchTest(MediaRootMixin, TestCase):
+    """Поиск рецептов: порядок по релевантности и листание страниц."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        author = create_user(1)
+        recipes = [create_recipe(author, number) for number in range(3)]
+        cls.by_name, cls.by_text, cls.other = recipes
+        cls.by_name.name = 'Жареные грибы'
+        cls.by_name.save()
+        cls.by_text.text = 'Гарнир к грибам'
+        cls.by_text.save()
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.user)
+
+    def test_relevance_order(self):
+        response = self.client.get('/api/recipes/', {'search': 'гриб'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            [self.by_name.id, self.by_text.id],
+        )
+
+    def test_cursor_keeps_pub_date_order(self):
+        response = self.client.get('/api/recipes/', {'cursor': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            list(Recipe.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )),
+        )
+
+    def test_cursor_with_search_rejected(self):
+        for path in ('/api/recipes/', '/api/recipes/feed/'):
+            with self.subTest(path=path):
+                response = self.client.get(
+                    path, {'search': 'гриб', 'cursor': ''}
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+class IngredientSearchTest(TestCase):
+    """
+    Индекс поиска ингредиентов сверяется с таблицей: записи мимо
+    сигналов, как из upload_json_to_db или другого процесса, видны сразу.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.flour = Ingredient.objects.create(
+            name='мука пшеничная', measurement_unit='г'
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/ingredients/', {'name': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.json()]
+
+    def test_bulk_create(self):
+        self.assertEqual(self.search('мук'), ['мука пшеничная'])
+        Ingredient.objects.bulk_create([
+            Ingredient(name='мука ржаная', measurement_unit='г'),
+        ])
+        self.assertEqual(
+            self.search('мук'), ['мука пшеничная', 'мука ржаная']
+        )
+
+    def test_update_and_delete(self):
+        self.search('мук')
+        Ingredient.objects.filter(pk=self.flour.pk).update(
+            name='мука кукурузная', version=current_stamp() + 1
+        )
+        self.assertEqual(self.search('мук'), ['мука кукурузная'])
+        Ingredient.objects.filter(pk=self.flour.pk)._raw_delete('default')
+        self.assertEqual(self.search('мук'), [])
+
+    def test_local_save_keeps_index(self):
+        self.search('мук')
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(
+                name='мука овсяная', measurement_unit='г'
+            )
+        self.assertIsNotNone(ingredient_index.version)
+        self.assertEqual(
+            self.search('мук'), ['мука овсяная', 'мука пшеничная']
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.filter(pk=self.flour.pk).delete()
+        self.assertIsNotNone(ingredient_index.version)
+        self.assertEqual(self.search('мук'), ['мука овсяная'])
+
+
+class StemmerCopyTest(SimpleTestCase):
+    """
+    Миграция 0010 заполняет поисковый индекс своей копией стеммера.
+    Копия должна давать те же основы, что recipes.search, иначе строки,
+    проиндексированные миграцией, не найдутся до rebuild_recipe_search.
+    """
+
+    def get_corpus(self):
+        path = settings.BASE_DIR / 'data' / 'ingredients.json'
+        with open(path, encoding='utf-8') as file:
+            words = {
+                word for row in json.load(file)
+                for word in search.WORD.findall(row['name'].casefold())
+            }
+        words.update(stem + ending for stem, ending in product(STEMS, ENDINGS))
+        return sorted(words)
+
+    def test_same_stems(self):
+        migration = import_module('recipes.migrations.0010_recipe_search')
+        corpus = self.get_corpus()
+        self.assertGreater(len(corpus), 1000)
+        self.assertEqual(
+            [migration.stem(word) for word in corpus],
+            [search.stem(word) for word in corpus],
+        )
+        text = ' '.join(corpus)
+        self.assertEqual(migration.stem_text(text), search.stem_text(text))
@@ -0,0 +1,152 @@
+from io import BytesIO
+from unittest import skipIf
+
+from django.test import SimpleTestCase, TestCase
+
+from api.shopping_list import TITLE, count_shopping_lists, render_pdf
+from api.tests.utils import (MediaRootMixin, create_ingredients,
+                             create_recipe, create_tags, create_user,
+                             get_client, recipe_payload)
+from recipes.models import Recipebook, ShoppingListItem
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+
+def extract_pdf_pages(content):
+    """Текст страниц PDF, как его извлекает сторонняя библиотека."""
+    return [
+        page.extract_text() for page in PdfReader(BytesIO(content)).pages
+    ]
+
+
+class ShoppingListTest(MediaRootMixin, TestCase):
+    """Сводная таблица ShoppingListItem следует за корзиной и рецептами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.author = create_user(1)
+        cls.tags = create_tags(1)
+        cls.ingredients = create_ingredients(3)
+        cls.first, cls.second, cls.third = (
+            ingredient.id for ingredient in cls.ingredients
+        )
+        # Количества: 1, 2 и 1, 2 по порядку ингредиентов.
+        cls.soup = create_recipe(cls.author, 0, cls.tags, cls.ingredients[:2])
+        cls.salad = create_recipe(
+            cls.author, 1, cls.tags, cls.ingredients[1:]
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.user)
+
+    def get_items(self):
+        items = dict(ShoppingListItem.objects.filter(
+            user=self.user
+        ).values_list('ingredient_id', 'amount'))
+        self.assertEqual(items, {
+            ingredient_id: amount
+            for (user_id, ingredient_id), amount
+            in count_shopping_lists([self.user.id]).items()
+        })
+        return items
+
+    def add(self, recipe):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/recipes/{recipe.id}/shopping_cart/'
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_cart_add_and_remove(self):
+        self.add(self.soup)
+        self.add(self.salad)
+        self.assertEqual(
+            self.get_items(), {self.first: 1, self.second: 3, self.third: 2}
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                f'/api/recipes/{self.soup.id}/shopping_cart/'
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_items(), {self.second: 1, self.third: 2})
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            'Список покупок:\n'
+            'Ингредиент 1 - 1 г\n'
+            'Ингредиент 2 - 2 г\n',
+        )
+
+    @skipIf(PdfReader is None, 'pypdf не установлен')
+    def test_pdf_download(self):
+        self.add(self.salad)
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'file_format': 'pdf'}
+        )
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        pages = extract_pdf_pages(b''.join(response.streaming_content))
+        self.assertEqual(pages[0].splitlines(), [
+            TITLE, 'Ингредиент 1 - 1 г', 'Ингредиент 2 - 2 г',
+        ])
+
+    def test_recipe_edit(self):
+        self.add(self.soup)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = get_client(self.author).patch(
+                f'/api/recipes/{self.soup.id}/',
+                recipe_payload(
+                    self.soup.name, self.tags,
+                    [self.ingredients[2], self.ingredients[1]],
+                ),
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_items(), {self.third: 1, self.second: 2})
+
+    def test_recipebook_change(self):
+        self.add(self.soup)
+        row = Recipebook.objects.get(
+            recipe=self.soup, ingredient_id=self.first
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            row.ingredient_id = self.third
+            row.amount = 5
+            row.save()
+        self.assertEqual(self.get_items(), {self.second: 2, self.third: 5})
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+        self.assertEqual(self.get_items(), {self.second: 2})
+
+    def test_recipe_delete(self):
+        self.add(self.soup)
+        self.add(self.salad)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salad.delete()
+        self.assertEqual(self.get_items(), {self.first: 1, self.second: 2})
+
+
+@skipIf(PdfReader is None, 'pypdf не установлен')
+class PDFExportTest(SimpleTestCase):
+    """Кириллица в PDF извлекается обратно, шрифт встроен."""
+
+    def test_text_and_pages(self):
+        items = [
+            ('Ёжевика №' + str(number), 'шт.', number)
+            for number in range(100)
+        ]
+        content = b''.join(render_pdf(iter(items)))
+        lines = []
+        for text in extract_pdf_pages(content):
+            lines += text.splitlines()
+        self.assertEqual(lines, [TITLE, *(
+            f'{name} - {amount} {unit}' for name, unit, amount in items
+        )])
+        font = PdfReader(BytesIO(content)).pages[0]['/Resources']['/Font']
+        descriptor = font['/F1']['/DescendantFonts'][0]['/FontDescriptor']
+        self.assertIn('/FontFile2', descriptor)
+        self.assertLess(len(content), 100_000)
@@ -0,0 +1,107 @@
+from io import StringIO
+from math import sqrt
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api.tests.utils import (MediaRootMixin, create_ingredients,
+                             create_recipe, create_user, get_client)
+from recipes.models import Recipebook, SimilarRecipe
+from recipes.similarity import RecipeMatrix
+
+
+class RecipeMatrixTest(TestCase):
+    """Косинусная похожесть и порядок соседей."""
+
+    def test_neighbours(self):
+        matrix = RecipeMatrix([
+            (1, 10), (1, 11), (1, 12),
+            (2, 10), (2, 11),
+            (3, 13),
+            (4, 10), (4, 11), (4, 12),
+            (5, 10), (5, 11),
+        ])
+        neighbours = dict(matrix.neighbours(matrix.positions([1, 3]), 3))
+        self.assertEqual([pk for pk, _ in neighbours[1]], [4, 5, 2])
+        self.assertAlmostEqual(neighbours[1][0][1], 1.0)
+        self.assertAlmostEqual(neighbours[1][1][1], 2 / sqrt(6), 5)
+        self.assertEqual(neighbours[3], [])
+
+    def test_missing_recipes(self):
+        matrix = RecipeMatrix([(1, 10), (3, 10)])
+        self.assertEqual(matrix.positions([3, 2, 1]).tolist(), [0, 1])
+
+
+@override_settings(SIMILAR_RECIPES_COUNT=2)
+class SimilarRecipesTest(MediaRootMixin, TestCase):
+    """Списки похожих из build_similar_recipes и их выдача."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        author = create_user(1)
+        ingredients = create_ingredients(5)
+        cls.ingredients = ingredients
+        cls.base = create_recipe(author, 0, (), ingredients[:4])
+        cls.close = create_recipe(author, 1, (), ingredients[:3])
+        cls.far = create_recipe(author, 2, (), ingredients[3:])
+        cls.unrelated = create_recipe(author, 3, (), ingredients[4:])
+        cls.empty = create_recipe(author, 4)
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.user)
+
+    def build(self, *args):
+        call_command('build_similar_recipes', *args, stdout=StringIO())
+
+    def get_similar(self, recipe):
+        response = self.client.get(f'/api/recipes/{recipe.id}/similar/')
+        self.assertEqual(response.status_code, 200)
+        return [(row['id'], row['similarity']) for row in response.json()]
+
+    def check_similar(self, recipe, expected):
+        similar = self.get_similar(recipe)
+        self.assertEqual(
+            [pk for pk, _ in similar], [pk for pk, _ in expected]
+        )
+        for (_, score), (_, expected_score) in zip(similar, expected):
+            self.assertAlmostEqual(score, expected_score, 4)
+
+    def test_scores_and_order(self):
+        self.build('--full')
+        self.check_similar(self.base, [
+            (self.close.id, 3 / sqrt(12)), (self.far.id, 1 / sqrt(8)),
+        ])
+        self.check_similar(self.unrelated, [(self.far.id, 1 / sqrt(2))])
+
+    def test_update_from_queue(self):
+        self.build('--full')
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipebook.objects.create(
+                recipe=self.unrelated, ingredient=self.ingredients[0],
+                amount=1,
+            )
+        self.build()
+        self.check_similar(self.unrelated, [
+            (self.far.id, 1 / 2), (self.close.id, 1 / sqrt(6)),
+        ])
+        self.check_similar(self.close, [
+            (self.base.id, 3 / sqrt(12)), (self.unrelated.id, 1 / sqrt(6)),
+        ])
+
+    def test_deleted_recipe(self):
+        self.build('--full')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.close.delete()
+        self.build()
+        self.check_similar(self.base, [(self.far.id, 1 / sqrt(8))])
+
+    def test_without_similar(self):
+        self.build('--full')
+        self.assertFalse(
+            SimilarRecipe.objects.filter(recipe=self.empty).exists()
+        )
+        self.assertEqual(self.get_similar(self.empty), [])
+        response = self.client.get('/api/recipes/0/similar/')
+        self.assertEqual(response.status_code, 404)
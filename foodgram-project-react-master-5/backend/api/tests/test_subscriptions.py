@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api.tests.utils import (MediaRootMixin, create_ingredients,
+                             create_recipe, create_tags, create_user,
+                             get_client, subscribe)
+
+# Токен с пользователем, COUNT(*), страница авторов, их рецепты.
+QUERIES = 4
+# По курсору страница выбирается без COUNT(*).
+CURSOR_QUERIES = 3
+
+
+class SubscriptionsQueriesTest(MediaRootMixin, TestCase):
+    """
+    Число запросов к БД у списка подписок не зависит от размера страницы,
+    числа авторов и recipes_limit.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        tags = create_tags()
+        ingredients = create_ingredients()
+        cls.authors = [create_user(number) for number in range(1, 7)]
+        for author in cls.authors:
+            for number in range(4):
+                create_recipe(author, number, tags[:2], ingredients[:3])
+        cls.reader_of_one = create_user(10)
+        subscribe(cls.reader_of_one, cls.authors[0])
+        cls.reader_of_all = create_user(11)
+        for author in cls.authors:
+            subscribe(cls.reader_of_all, author)
+
+    def get_subscriptions(self, client, params, queries):
+        cache.clear()
+        with self.assertNumQueries(queries):
+            response = client.get('/api/users/subscriptions/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def check_queries(self):
+        for reader, authors in (
+            (self.reader_of_one, 1), (self.reader_of_all, 6),
+        ):
+            client = get_client(reader)
+            for page_size in (1, 3, 6):
+                for recipes_limit in ('', '0', '1', '4'):
+                    params = {
+                        'limit': page_size, 'recipes_limit': recipes_limit,
+                    }
+                    with self.subTest(
+                        authors=authors, page_size=page_size,
+                        recipes_limit=recipes_limit,
+                    ):
+                        data = self.get_subscriptions(
+                            client, params, QUERIES
+                        )
+                        self.assertEqual(
+                            len(data['results']), min(page_size, authors)
+                        )
+                        data = self.get_subscriptions(
+                            client, {**params, 'cursor': ''}, CURSOR_QUERIES
+                        )
+                        self.assertEqual(
+                            len(data['results']), min(page_size, authors)
+                        )
+
+    def test_fast_serializers(self):
+        with override_settings(FAST_READ_SERIALIZERS=True):
+            self.check_queries()
+
+    def test_drf_serializers(self):
+        with override_settings(FAST_READ_SERIALIZERS=False):
+            self.check_queries()
@@ -0,0 +1,93 @@
+from django.test import TestCase, override_settings
+
+from api.search.recipe_ingredients import VERSION, recipe_ingredient_index
+from api.tests.utils import (MediaRootMixin, create_ingredients,
+                             create_recipe, create_tags, create_user,
+                             get_client, recipe_payload)
+from api.versions import bump_version
+from recipes.models import Recipebook
+
+
+class WhatToCookTest(MediaRootMixin, TestCase):
+    """Поиск рецептов по имеющимся ингредиентам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.tags = create_tags(1)
+        cls.ingredients = create_ingredients(4)
+        first, second, third, fourth = cls.ingredients
+        cls.pair = create_recipe(cls.author, 0, cls.tags, [first, second])
+        cls.big = create_recipe(cls.author, 1, cls.tags, cls.ingredients)
+        cls.other = create_recipe(cls.author, 2, cls.tags, [third])
+        cls.single = create_recipe(cls.author, 3, cls.tags, [first])
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.author)
+
+    def search(self, *ingredients):
+        response = self.client.get('/api/recipes/what_to_cook/', {
+            'ingredients': [ingredient.id for ingredient in ingredients],
+        })
+        self.assertEqual(response.status_code, 200)
+        return [
+            (row['id'], row['coverage'], row['missing_ingredients'])
+            for row in response.json()['results']
+        ]
+
+    def check_ranking(self):
+        first, second = self.ingredients[:2]
+        self.assertEqual(self.search(first, second), [
+            (self.pair.id, 1.0, 0),
+            (self.single.id, 1.0, 0),
+            (self.big.id, 0.5, 2),
+        ])
+
+    def test_ranking(self):
+        self.check_ranking()
+
+    @override_settings(RECIPE_INGREDIENT_INDEX=False)
+    def test_ranking_in_db(self):
+        self.check_ranking()
+
+    def test_index_follows_recipe_edit(self):
+        first, second, third, fourth = self.ingredients
+        self.check_ranking()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/recipes/{self.other.id}/',
+                recipe_payload(self.other.name, self.tags, [second, first]),
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(recipe_ingredient_index.version)
+        self.assertEqual(self.search(first, second), [
+            (self.other.id, 1.0, 0),
+            (self.pair.id, 1.0, 0),
+            (self.single.id, 1.0, 0),
+            (self.big.id, 0.5, 2),
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.big.delete()
+        self.assertEqual(self.search(fourth), [])
+
+    def test_index_rebuilt_on_version(self):
+        first, second, third, fourth = self.ingredients
+        self.check_ranking()
+        Recipebook.objects.bulk_create([
+            Recipebook(recipe=self.other, ingredient=fourth, amount=1),
+        ])
+        bump_version(VERSION)
+        self.assertEqual(self.search(third, fourth), [
+            (self.other.id, 1.0, 0),
+            (self.big.id, 0.5, 2),
+        ])
+
+    def test_invalid_ingredients(self):
+        for params in ({}, {'ingredients': 'мука'}):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    '/api/recipes/what_to_cook/', params
+                )
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+from base64 import b64encode
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.recipe_cache import recipe_bodies
+from recipes.models import Ingredient, Recipe, Recipebook, Tag
+from users.models import Subscription, User
+
+
+def image_file(color=(200, 80, 40), size=(64, 48), name='dish.png'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+def image_data(color=(200, 80, 40), size=(64, 48)):
+    """Картинка в виде data URI, как её присылает клиент."""
+    content = image_file(color, size).read()
+    return 'data:image/png;base64,' + b64encode(content).decode()
+
+
+def recipe_payload(name, tags, ingredients, **fields):
+    """Тело запроса на создание или изменение рецепта."""
+    return {
+        'name': name,
+        'text': f'Описание: {name}',
+        'cooking_time': 10,
+        'image': image_data(),
+        'tags': [tag.id for tag in tags],
+        'ingredients': [
+            {'id': ingredient.id, 'amount': index + 1}
+            for index, ingredient in enumerate(ingredients)
+        ],
+        **fields,
+    }
+
+
+def create_user(number):
+    return User.objects.create_user(
+        username=f'user{number}', email=f'user{number}@example.com',
+        password='password', first_name='Имя', last_name='Фамилия',
+    )
+
+
+def create_tags(count=3):
+    return [
+        Tag.objects.create(
+            name=f'Тег {number}', color=f'#00000{number}', slug=f'tag{number}'
+        )
+        for number in range(count)
+    ]
+
+
+def create_ingredients(count=10):
+    return Ingredient.objects.bulk_create(
+        Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+        for number in range(count)
+    )
+
+
+def create_recipe(author, number, tags=(), ingredients=()):
+    """Рецепт с картинкой своего цвета, тегами и ингредиентами."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=f'Рецепт {author.id}-{number}',
+        text=f'Описание рецепта {number}',
+        cooking_time=number + 1,
+        image=image_file(color=(author.id * 20 % 256, number * 30 % 256, 90)),
+    )
+    recipe.tags.set(tags)
+    Recipebook.objects.bulk_create(
+        Recipebook(recipe=recipe, ingredient=ingredient, amount=index + 1)
+        for index, ingredient in enumerate(ingredients)
+    )
+    return recipe
+
+
+def subscribe(follower, author):
+    return Subscription.objects.create(follower=follower, author=author)
+
+
+def get_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+    )
+    return client
+
+
+class MediaRootMixin:
+    """
+    Картинки рецептов пишутся во временный каталог и обрабатываются
+    сразу; кэши тел рецептов и версий сбрасываются перед каждым тестом.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(
+            MEDIA_ROOT=cls.media_root, IMAGE_PROCESSING_SYNC=True
+        )
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        recipe_bodies.clear()
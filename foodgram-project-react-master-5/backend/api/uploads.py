@@ -0,0 +1,128 @@
+"""
+Потоковое декодирование картинок из data URI.
+Размер проверяется по длине строки до декодирования, формат и
+разрешение — по первым декодированным байтам. Данные декодируются
+кусками в файл: небольшие в памяти, крупные сразу во временный файл
+на диске, который хранилище потом просто перемещает.
+"""
+import binascii
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import (InMemoryUploadedFile,
+                                            TemporaryUploadedFile)
+from PIL import Image, ImageFile
+
+CHUNK_SIZE = 64 * 1024
+HEADER_LIMIT = 1024 * 1024
+DATA_URI_PREFIX_LIMIT = 256
+WHITESPACE = ' \n\r\t'
+FORMATS = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'PNG': ('png', 'image/png'),
+    'GIF': ('gif', 'image/gif'),
+    'WEBP': ('webp', 'image/webp'),
+}
+
+
+class ImageDecodeError(ValueError):
+    """Строку нельзя принять как картинку; текст ошибки — для клиента."""
+
+
+def parse_data_uri(data):
+    """Смещение начала base64 и заявленный тип из заголовка data URI."""
+    marker = data.find('base64,', 0, DATA_URI_PREFIX_LIMIT)
+    if marker == -1:
+        return 0, None
+    header = data[:marker]
+    media_type = None
+    if header.startswith('data:'):
+        media_type = header[len('data:'):].split(';')[0] or None
+    return marker + len('base64,'), media_type
+
+
+def iter_decoded(data, start):
+    """Декодированные куски base64 начиная с позиции start."""
+    carry = ''
+    for position in range(start, len(data), CHUNK_SIZE):
+        piece = data[position:position + CHUNK_SIZE]
+        if not piece.isascii():
+            raise ImageDecodeError('Картинка должна быть в base64.')
+        if any(char in piece for char in WHITESPACE):
+            piece = ''.join(piece.split())
+        piece = carry + piece
+        usable = len(piece) - len(piece) % 4
+        carry = piece[usable:]
+        try:
+            yield binascii.a2b_base64(piece[:usable])
+        except binascii.Error:
+            raise ImageDecodeError('Картинка должна быть в base64.')
+    if carry.rstrip('='):
+        raise ImageDecodeError('Картинка должна быть в base64.')
+
+
+def decode_image(data, max_size=None, max_pixels=None):
+    """
+    Картинка из base64 или data URI в виде загруженного файла.
+    Формат и разрешение проверяются, как только ImageFile.Parser
+    прочитает заголовок, остальное декодируется только после этого.
+    """
+    max_size = max_size or settings.RECIPE_IMAGE_MAX_SIZE
+    max_pixels = max_pixels or settings.RECIPE_IMAGE_MAX_PIXELS
+    start, media_type = parse_data_uri(data)
+    if media_type is not None and not media_type.startswith('image/'):
+        raise ImageDecodeError('Ожидается картинка.')
+    expected_size = (len(data) - start) * 3 // 4
+    if expected_size > max_size:
+        raise ImageDecodeError(
+            f'Картинка больше {max_size // (1024 * 1024)} МБ.'
+        )
+
+    if expected_size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+        upload = TemporaryUploadedFile('image', None, expected_size, None)
+    else:
+        upload = InMemoryUploadedFile(
+            BytesIO(), 'image', 'image', None, expected_size, None
+        )
+    parser = ImageFile.Parser()
+    image = None
+    size = 0
+    try:
+        for chunk in iter_decoded(data, start):
+            size += len(chunk)
+            upload.write(chunk)
+            if image is None:
+                image = check_header(parser, chunk, size, max_pixels)
+    except Exception:
+        upload.close()
+        raise
+    if image is None:
+        upload.close()
+        raise ImageDecodeError('Не удалось определить формат файла.')
+    extension, content_type = FORMATS[image.format]
+    upload.name = f'{str(uuid.uuid4())[:12]}.{extension}'
+    upload.content_type = content_type
+    upload.size = size
+    upload.seek(0)
+    return upload
+
+
+def check_header(parser, chunk, size, max_pixels):
+    """Заголовок картинки, когда парсер его дочитал, иначе None."""
+    try:
+        parser.feed(chunk)
+    except Image.DecompressionBombError:
+        raise ImageDecodeError('Слишком большое разрешение картинки.')
+    except Exception:
+        raise ImageDecodeError('Не удалось определить формат файла.')
+    image = parser.image
+    if image is None:
+        if size > HEADER_LIMIT:
+            raise ImageDecodeError('Не удалось определить формат файла.')
+        return None
+    if image.format not in FORMATS:
+        raise ImageDecodeError(f'Формат {image.format} не поддерживается.')
+    if image.width * image.height > max_pixels:
+        raise ImageDecodeError('Слишком большое разрешение картинки.')
+    return image
@@ -0,0 +1,39 @@
+from time import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'version:{}'
+
+
+def get_version(name):
+    """Текущее значение счётчика версий."""
+    return get_versions([name])[name]
+
+
+def get_versions(names):
+    """
+    Значения нескольких счётчиков версий за одно обращение к кэшу.
+    Новый счётчик начинается с текущего времени в миллисекундах, поэтому
+    после очистки кэша версии не повторяют выданные ранее.
+    """
+    names = set(names)
+    found = cache.get_many([VERSION_KEY.format(name) for name in names])
+    versions = {}
+    for name in names:
+        version = found.get(VERSION_KEY.format(name))
+        if version is None:
+            cache.add(
+                VERSION_KEY.format(name), int(time() * 1000), timeout=None
+            )
+            version = cache.get(VERSION_KEY.format(name))
+        versions[name] = version
+    return versions
+
+
+def bump_version(name):
+    """Увеличивает счётчик версий, сбрасывая всё, что от него зависит."""
+    try:
+        return cache.incr(VERSION_KEY.format(name))
+    except ValueError:
+        cache.add(VERSION_KEY.format(name), int(time() * 1000), timeout=None)
+        return cache.incr(VERSION_KEY.format(name))
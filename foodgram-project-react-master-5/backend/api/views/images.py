@@ -0,0 +1,40 @@
+import logging
+import mimetypes
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+
+from recipes.models import Recipe
+from recipes.variants import VARIANT_FORMATS, get_variant
+
+logger = logging.getLogger(__name__)
+
+
+def image_variant(request, stem, width, extension):
+    """
+    Копия картинки рецепта по адресу из media. Отвечает, только пока
+    файла копии нет: после первого обращения его отдаёт веб-сервер.
+    """
+    width = int(width)
+    if (
+        extension not in VARIANT_FORMATS
+        or width not in settings.RECIPE_IMAGE_VARIANT_WIDTHS
+    ):
+        raise Http404
+    field = Recipe._meta.get_field('image')
+    name = Recipe.objects.filter(
+        image__startswith=f'{field.upload_to}{stem}.'
+    ).values_list('image', flat=True).first()
+    if name is None:
+        raise Http404
+    try:
+        variant = get_variant(field.storage, name, width, extension)
+    except OSError:
+        logger.exception('Не удалось сделать копию картинки %s', name)
+        raise Http404
+    response = FileResponse(
+        field.storage.open(variant),
+        content_type=mimetypes.guess_type(variant)[0],
+    )
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -1,37 +1,112 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django_filters import rest_framework as filters
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from api.catalog import ingredient_snapshot, tag_catalog
+from api.conditional import ConditionalGetMixin
 from api.filters import IngredientsFilter, RecipesFilterSet
 from api.pagination import LimitPageNumberPagination
 from api.permissions import IsAuthorOrIsAuthenticatedOrReadOnly
+from api.preloaders import PreloadRelationsMixin
+from api.recipe_cache import (BODY_KEY_FIELDS, get_recipe_bodies,
+                              overlay_user_data, recipe_bodies,
+                              render_user_fragment)
+from api.search.ingredients import search_ingredients
+from api.search.recipe_ingredients import rank_recipes_by_ingredients
 from api.serializers.recipes import (FavoriteSerializer, IngredientSerializer,
                                      RecipeCreateUpdateSerializer,
                                      RecipeReadSerializer,
                                      ShoppingCartSerializer,
                                      ShortRecipeSerializer, TagSerializer)
-from recipes.models import (Favorite, Ingredient, Recipe, Recipebook,
-                            ShoppingCart, Tag)
+from api.shopping_list import EXPORT_FORMATS, get_shopping_list
+from recipes.feed import get_feed
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            SimilarRecipe, Tag)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, PreloadRelationsMixin,
+                    viewsets.ModelViewSet):
     """ Класс представления для работы с рецептами. """
     
     pagination_class = LimitPageNumberPagination
+    keyset_ordering = ('-pub_date', '-id')
+    cursor_only = False
+    count_versions = ('recipes',)
     queryset = Recipe.objects.prefetch_related(
-        'ingredients', 'tags'
+        'recipebook_set__ingredient', 'tags'
     ).select_related('author')
     permission_classes = (IsAuthorOrIsAuthenticatedOrReadOnly,)
     filterset_class = RecipesFilterSet
     filter_backends = (filters.DjangoFilterBackend,)
     
+    def get_page_etag_versions(self, recipes):
+        """
+        Версии, от которых зависит выдача рецептов: авторы учитываются
+        только те, чьи рецепты попали в выдачу.
+        """
+        versions = ['tags', 'ingredients']
+        if self.action == 'retrieve':
+            versions.append(f'recipe:{self.kwargs[self.lookup_field]}')
+        else:
+            versions.append('recipes')
+        versions.extend({f'user:{recipe.author_id}' for recipe in recipes})
+        if self.request.user.is_authenticated:
+            versions.append(f'relations:{self.request.user.id}')
+        return versions
+
+    def get_queryset(self):
+        if self.use_recipe_bodies():
+            return Recipe.objects.only(*BODY_KEY_FIELDS, 'pub_date')
+        return super().get_queryset()
+
+    def use_recipe_bodies(self):
+        """Чтение через кэш тел рецептов и/или быстрые сериализаторы."""
+        return (
+            (recipe_bodies.maxsize > 0 or settings.FAST_READ_SERIALIZERS)
+            and self.action in ('list', 'retrieve')
+        )
+
+    def render_recipes(self, recipes):
+        """Общие тела рецептов с наложенными флагами пользователя."""
+        relations = self.preload_relations(recipes)
+        render = (
+            render_user_fragment
+            if getattr(self.request.accepted_renderer,
+                       'accepts_fragments', False)
+            else overlay_user_data
+        )
+        return [
+            render(body, self.request, relations)
+            for body in get_recipe_bodies(recipes)
+        ]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        self.check_not_modified(self.get_page_etag_versions(page))
+        if not self.use_recipe_bodies():
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return self.get_paginated_response(self.render_recipes(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        self.check_not_modified(self.get_page_etag_versions([instance]))
+        if not self.use_recipe_bodies():
+            return Response(self.get_serializer(instance).data)
+        return Response(self.render_recipes([instance])[0])
+
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in (
+            'list', 'retrieve', 'what_to_cook', 'similar', 'feed'
+        ):
             return RecipeReadSerializer
         if self.action in ('favorite', 'shopping_cart'):
             return ShortRecipeSerializer
@@ -96,24 +171,97 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def download_shopping_cart(self, request):
-        ingredients = Recipebook.objects.filter(
-            recipe__shopping_carts__user=request.user
-        ).values_list(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(Sum('amount')).order_by()
-        
-        file_content = "Список покупок:\n"
-        for name, unit, amount in ingredients:
-            file_content += f"{name} - {amount} {unit}\n"
-        
-        response = HttpResponse(file_content, content_type='text/plain')
+        file_format = request.query_params.get('file_format', 'txt')
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError({'file_format': (
+                f'Допустимые форматы: {", ".join(EXPORT_FORMATS)}.'
+            )})
+        render, content_type = EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            render(get_shopping_list(request.user)),
+            content_type=content_type,
+        )
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="shopping_list.{file_format}"'
         )
         return response
 
+    @action(detail=False, methods=['get'], keyset_ordering=None)
+    def what_to_cook(self, request):
+        """
+        Рецепты из имеющихся ингредиентов (?ingredients=id, можно
+        несколько) по убыванию доли ингредиентов рецепта, которые уже
+        есть. Ранжирование идёт по индексу, из БД читается только страница.
+        """
+        ingredient_ids = request.query_params.getlist('ingredients')
+        if not ingredient_ids or not all(
+            pk.isdigit() for pk in ingredient_ids
+        ):
+            raise ValidationError(
+                {'ingredients': 'Ожидается один или несколько id.'}
+            )
+        page = self.paginate_queryset(
+            rank_recipes_by_ingredients({int(pk) for pk in ingredient_ids})
+        )
+        scores = {
+            recipe_id: (matched, total) for recipe_id, matched, total in page
+        }
+        recipes = Recipe.objects.only(*BODY_KEY_FIELDS).in_bulk(scores)
+        recipes = [
+            recipes[recipe_id] for recipe_id in scores if recipe_id in recipes
+        ]
+        relations = self.preload_relations(recipes)
+        data = []
+        for body in get_recipe_bodies(recipes):
+            matched, total = scores[body.data['id']]
+            data.append({
+                **overlay_user_data(body, request, relations),
+                'coverage': round(matched / total, 4),
+                'missing_ingredients': total - matched,
+            })
+        return self.get_paginated_response(data)
+
+    @action(detail=False, methods=['get'], cursor_only=True,
+            permission_classes=(IsAuthenticated,))
+    def feed(self, request):
+        """
+        Рецепты авторов из подписок, новые первыми, страницы по курсору.
+        Лента читается из заранее разложенных записей, см. recipes.feed.
+        """
+        queryset = self.filter_queryset(
+            get_feed(request.user).only(*BODY_KEY_FIELDS, 'pub_date')
+        )
+        return self.get_paginated_response(
+            self.render_recipes(self.paginate_queryset(queryset))
+        )
+
+    @action(detail=True, methods=['get'], pagination_class=None)
+    def similar(self, request, pk=None):
+        """
+        Рецепты, ближайшие к данному по составу ингредиентов, с мерой
+        похожести similarity. Списки заранее считает команда
+        build_similar_recipes, здесь они только читаются.
+        """
+        scores = dict(SimilarRecipe.objects.filter(
+            recipe_id=pk
+        ).values_list('similar_id', 'score'))
+        if not scores:
+            get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        recipes = Recipe.objects.only(*BODY_KEY_FIELDS).in_bulk(scores)
+        recipes = [
+            recipes[recipe_id] for recipe_id in scores if recipe_id in recipes
+        ]
+        relations = self.preload_relations(recipes)
+        return Response([
+            {
+                **overlay_user_data(body, request, relations),
+                'similarity': scores[body.data['id']],
+            }
+            for body in get_recipe_bodies(recipes)
+        ])
+
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для ингредиентов."""
     
     queryset = Ingredient.objects.all()
@@ -122,9 +270,58 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     filter_backends = (IngredientsFilter,)
     search_fields = ('name',)
+    etag_versions = ('ingredients',)
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('name')
+        if not query or not settings.INGREDIENT_SEARCH_INDEX:
+            return super().list(request, *args, **kwargs)
+        fuzzy = request.query_params.get('fuzzy', '').lower()
+        return Response(
+            search_ingredients(query, fuzzy=fuzzy in ('1', 'true'))
+        )
 
+    @action(detail=False, methods=['get'])
+    def snapshot(self, request):
+        """
+        Каталог целиком, заранее сжатый, или изменения с since_version.
+        """
+        since_version = request.query_params.get('since_version')
+        if since_version is not None:
+            if not since_version.isdigit():
+                raise ValidationError(
+                    {'since_version': 'Ожидается целое неотрицательное число.'}
+                )
+            return Response(ingredient_snapshot.changes(int(since_version)))
+        version, variants = ingredient_snapshot.get()
+        etag = f'W/"ingredients-{version}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            encoding = choose_encoding(request, variants)
+            response = HttpResponse(
+                variants[encoding], content_type='application/json'
+            )
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.headers['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+def choose_encoding(request, variants):
+    """Лучшая из поддерживаемых клиентом кодировок документа."""
+    accepted = {
+        token.split(';')[0].strip()
+        for token in request.headers.get('Accept-Encoding', '').split(',')
+        if not token.replace(' ', '').endswith(';q=0')
+    }
+    for encoding in ('br', 'gzip'):
+        if encoding in accepted and encoding in variants:
+            return encoding
+    return 'identity'
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+
+class TagViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Предоставляет доступ только для чтения к тегам.
     Доступен всем пользователям, без ограничений по авторизации.
@@ -133,3 +330,16 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
+    etag_versions = ('tags',)
+
+    def list(self, request, *args, **kwargs):
+        return Response(tag_catalog.serialize())
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            tag = tag_catalog.get(int(kwargs[self.lookup_field]))
+        except ValueError:
+            tag = None
+        if tag is None:
+            raise Http404
+        return Response(tag_catalog.serialize([tag.id])[0])
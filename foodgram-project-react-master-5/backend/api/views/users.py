@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import status
@@ -6,16 +7,20 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from api.pagination import LimitPageNumberPagination
+from api.preloaders import (PreloadRelationsMixin, get_recipes_limit,
+                            get_top_recipes, group_by_author)
+from api.serializers.fast import render_subscriptions
 from api.serializers.users import (FollowerSerializer, SubscriptionSerializer,
                                    UserReadSerializer)
 from users.models import Subscription, User
 
 
-class UserViewSet(DjoserUserViewSet):
+class UserViewSet(PreloadRelationsMixin, DjoserUserViewSet):
     """ViewSet для работы с пользователями."""
     queryset = User.objects.all()
     serializer_class = SubscriptionSerializer
     pagination_class = LimitPageNumberPagination
+    keyset_ordering = None
     
     def get_permissions(self):
         if self.action in ('me',):
@@ -53,19 +58,28 @@ class UserViewSet(DjoserUserViewSet):
         
         return Response(status=status.HTTP_204_NO_CONTENT)
     
-    @action(detail=False, methods=['get'], url_path='subscriptions', permission_classes=(IsAuthenticated,))
+    @action(detail=False, methods=['get'], url_path='subscriptions',
+            permission_classes=(IsAuthenticated,),
+            keyset_ordering=('username', 'id'))
     def user_subscriptions(self, request):
-        user = request.user
-        
-        authors = User.objects.filter(following__follower=user)
+        recipes_limit = get_recipes_limit(request)
+        authors = User.objects.filter(bloger__follower=request.user)
         page = self.paginate_queryset(authors)
         
-        context = {'request': request, 'is_subscription_request': True}
-        
+        if settings.FAST_READ_SERIALIZERS:
+            return self.get_paginated_response(
+                render_subscriptions(page, request, recipes_limit)
+            )
+        context = {
+            'request': request,
+            'is_subscription_request': True,
+            'author_recipes': group_by_author(get_top_recipes(
+                [author.id for author in page], recipes_limit
+            )),
+        }
         serializer = SubscriptionSerializer(
             page,
             many=True,
             context=context
         )
         return self.get_paginated_response(serializer.data)
-        
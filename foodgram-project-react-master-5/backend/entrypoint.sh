@@ -8,6 +8,8 @@ python manage.py makemigrations
 
 python manage.py migrate
 
+python manage.py createcachetable
+
 echo "from django.contrib.auth import get_user_model; User = get_user_model(); print(User.objects.filter(username='skrynch33').exists())" | python manage.py shell | grep "True" || (
 
   echo "from django.contrib.auth import get_user_model; User = get_user_model(); User.objects.create_superuser('skrynch33', 'dubkibobri@mail.ru', '199021ppc1313Aa')" | python manage.py shell
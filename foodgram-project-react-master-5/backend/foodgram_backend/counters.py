@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class CounterField(models.PositiveIntegerField):
+    """
+    Денормализованный счётчик связанных строк.
+    Меняется только атомарными F()-обновлениями, см. recipes.counters.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', 0)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+
+class CounterFieldsMixin:
+    """
+    Обычное сохранение модели не перезаписывает её счётчики и поля из
+    separately_updated_fields: их меняют только точечные UPDATE, и
+    значения в памяти у загруженного раньше объекта могут быть устаревшими.
+    """
+
+    separately_updated_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not args
+            and kwargs.get('update_fields') is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and not isinstance(field, CounterField)
+                and field.name not in self.separately_updated_fields
+                and field.attname not in deferred
+            ]
+        return super().save(*args, **kwargs)
@@ -138,7 +138,86 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
 }
 
 PAGE_SIZE = 6
+
+# Версии данных и закэшированные count живут в кэше по умолчанию, и он
+# должен быть общим для всех процессов: воркеров сервера и
+# management-команд. По умолчанию это таблица в БД (manage.py
+# createcachetable), можно задать Redis или Memcached. Кэш в памяти
+# процесса допускается только при DEBUG, см. api.checks.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram_cache'),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('.DatabaseCache'):
+    # 300 записей по умолчанию мало: вытесненная версия сбрасывает всё,
+    # что от неё зависит.
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 100_000}
+
+# Подсчёт count в пагинации: exact, cached или estimated.
+PAGINATION_COUNT_STRATEGY = os.getenv('PAGINATION_COUNT_STRATEGY', 'cached')
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = 10000
+
+# Число тел рецептов в LRU-кэше процесса, 0 отключает кэш.
+RECIPE_BODY_CACHE_SIZE = 2000
+
+# Сборка выдачи рецептов и подписок из values() в обход полей DRF.
+FAST_READ_SERIALIZERS = os.getenv('FAST_READ_SERIALIZERS', 'True') == 'True'
+
+# Поиск ингредиентов по ?name= через индекс в памяти процесса.
+INGREDIENT_SEARCH_INDEX = (
+    os.getenv('INGREDIENT_SEARCH_INDEX', 'True') == 'True'
+)
+INGREDIENT_SEARCH_LIMIT = 50
+# Добор выдачи похожими названиями по ?name=...&fuzzy=1; False отключает
+# этот режим. Порог сходства одинаков для pg_trgm и индекса в памяти.
+INGREDIENT_SEARCH_FUZZY = True
+INGREDIENT_FUZZY_THRESHOLD = 0.3
+# Поиск рецептов по имеющимся ингредиентам через обратный индекс в памяти.
+RECIPE_INGREDIENT_INDEX = True
+# Похожие рецепты: сколько хранить на рецепт и сколько строк матрицы
+# умножать за раз в build_similar_recipes.
+SIMILAR_RECIPES_COUNT = 10
+SIMILAR_RECIPES_BLOCK_SIZE = 500
+# Лента подписок: сколько рецептов хранить в ленте и с какого числа
+# подписчиков новые рецепты автора подмешиваются при чтении, а не
+# раскладываются.
+FEED_LENGTH = 200
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+
+# Шрифт TrueType с кириллицей для выгрузки списка покупок в PDF, в образе
+# ставится пакетом fonts-dejavu-core.
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
+# Уменьшение картинок рецептов в фоне; True — сразу при сохранении.
+IMAGE_PROCESSING_SYNC = os.getenv('IMAGE_PROCESSING_SYNC', 'False') == 'True'
+IMAGE_PROCESSING_WORKERS = 2
+
+# Ограничения на картинку рецепта в base64: байты после декодирования
+# и число пикселей по заголовку.
+RECIPE_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 40_000_000
+
+# Ширины копий картинки рецепта в WebP и JPEG, см. recipes.variants.
+RECIPE_IMAGE_VARIANT_WIDTHS = (160, 320, 500)
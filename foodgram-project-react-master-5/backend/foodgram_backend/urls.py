@@ -1,9 +1,16 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from api.views.images import image_variant
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}recipes/variants/'
+        r'(?P<stem>[\w-]+)/(?P<width>\d+)\.(?P<extension>\w+)$',
+        image_variant,
+    ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
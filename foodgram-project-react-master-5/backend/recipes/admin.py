@@ -8,6 +8,12 @@ class RecipeIngredientInLine(admin.TabularInline):
 
     model = Recipebook
     extra = 1
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'ingredient', 'recipe__author'
+        )
 
 
 class RecipeTagInLine(admin.TabularInline):
@@ -15,6 +21,12 @@ class RecipeTagInLine(admin.TabularInline):
 
     model = RecipeTags
     extra = 1
+    autocomplete_fields = ('tags',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'tags', 'recipe__author'
+        )
 
 
 @admin.register(Recipe)
@@ -24,17 +36,28 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = [
         'name',
         'author',
+        'pub_date',
         'get_count_of_favorites',
     ]
     list_filter = [
-        'author',
-        'name',
         'tags',
     ]
-
-    @admin.display(description='Количество добавлений в избранное')
+    list_select_related = ('author',)
+    search_fields = [
+        'name',
+        'author__username',
+        'author__email',
+    ]
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
+
+    @admin.display(
+        description='Количество добавлений в избранное',
+        ordering='favorites_count',
+    )
     def get_count_of_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
     inlines = (RecipeIngredientInLine, RecipeTagInLine)
 
@@ -48,14 +71,12 @@ class IngredientAdmin(admin.ModelAdmin):
         'measurement_unit',
     ]
 
-    list_filter = [
-        'name',
-    ]
-
     search_fields = [
         'name',
     ]
 
+    show_full_result_count = False
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
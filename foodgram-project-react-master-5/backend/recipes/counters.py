@@ -0,0 +1,104 @@
+"""
+Денормализованные счётчики: число рецептов и подписчиков у пользователя,
+добавлений в избранное и в корзины у рецепта.
+Счётчик меняется атомарным F()-обновлением из сигналов сохранения и
+удаления строк, которые он считает; удаление через QuerySet и каскад
+тоже отправляют post_delete. Расхождения находит и исправляет команда
+reconcile_counters.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+
+class Counter:
+    """Поле field модели, на которую ссылается внешний ключ source.key."""
+
+    def __init__(self, source, key, field):
+        self.source = source
+        self.key = key
+        self.attname = source._meta.get_field(key).attname
+        self.model = source._meta.get_field(key).related_model
+        self.field = field
+
+    def __str__(self):
+        return f'{self.model._meta.label}.{self.field}'
+
+    def change(self, pk, delta):
+        counters = self.model.objects.filter(pk=pk)
+        if delta < 0:
+            counters = counters.filter(**{f'{self.field}__gte': -delta})
+        counters.update(**{self.field: F(self.field) + delta})
+
+    def actual(self):
+        """Подзапрос с настоящим числом строк для каждой строки model."""
+        return Coalesce(Subquery(
+            self.source.objects.filter(
+                **{self.attname: OuterRef('pk')}
+            ).order_by().values(self.attname).annotate(
+                total=Count('pk')
+            ).values('total')
+        ), Value(0))
+
+    def drifted(self):
+        return self.model.objects.annotate(actual=self.actual()).exclude(
+            **{self.field: F('actual')}
+        )
+
+    def reconcile(self):
+        """Исправляет расходящиеся счётчики, возвращает их число."""
+        ids = list(self.drifted().values_list('pk', flat=True))
+        if ids:
+            self.model.objects.filter(pk__in=ids).update(
+                **{self.field: self.actual()}
+            )
+        return len(ids)
+
+    def remember(self, sender, instance, raw=False, **kwargs):
+        """Прежнее значение ключа, если строку перевесили на другую."""
+        instance._counter_keys = getattr(instance, '_counter_keys', {})
+        if instance.pk and not raw and not instance._state.adding:
+            instance._counter_keys[self.attname] = sender.objects.filter(
+                pk=instance.pk
+            ).values_list(self.attname, flat=True).first()
+
+    def saved(self, sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        pk = getattr(instance, self.attname)
+        if created:
+            self.change(pk, 1)
+            return
+        previous = getattr(instance, '_counter_keys', {}).get(self.attname)
+        if previous is not None and previous != pk:
+            self.change(previous, -1)
+            self.change(pk, 1)
+
+    def deleted(self, sender, instance, **kwargs):
+        self.change(getattr(instance, self.attname), -1)
+
+    def connect(self):
+        uid = f'counters:{self}'
+        pre_save.connect(
+            self.remember, sender=self.source, weak=False,
+            dispatch_uid=f'{uid}:pre_save',
+        )
+        post_save.connect(
+            self.saved, sender=self.source, weak=False,
+            dispatch_uid=f'{uid}:post_save',
+        )
+        post_delete.connect(
+            self.deleted, sender=self.source, weak=False,
+            dispatch_uid=f'{uid}:post_delete',
+        )
+
+
+COUNTERS = (
+    Counter(Recipe, 'author', 'recipes_count'),
+    Counter(Subscription, 'author', 'followers_count'),
+    Counter(Favorite, 'recipe', 'favorites_count'),
+    Counter(ShoppingCart, 'recipe', 'shopping_carts_count'),
+)
@@ -0,0 +1,134 @@
+"""
+Лента рецептов авторов, на которых подписан пользователь.
+Новый рецепт сразу раскладывается по лентам подписчиков (FeedEntry),
+в ленте остаются FEED_LENGTH последних рецептов. Рецепт автора, у
+которого больше FEED_FANOUT_MAX_FOLLOWERS подписчиков, не раскладывается,
+а помечается feed_merged и подмешивается при чтении, так что запись
+рецепта не зависит от числа подписчиков. Пометка остаётся и после того,
+как подписчиков стало меньше: такие рецепты не пропадают из лент.
+Подписка заполняет ленту последними разложенными рецептами автора,
+отписка убирает их.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscription, User
+
+
+def get_feed(user):
+    """
+    Рецепты ленты пользователя: записи его ленты и помеченные рецепты
+    авторов из подписок. Сортировку задаёт пагинация.
+    """
+    return Recipe.objects.filter(
+        Q(id__in=FeedEntry.objects.filter(user=user).values('recipe_id'))
+        | Q(feed_merged=True, author_id__in=Subscription.objects.filter(
+            follower=user
+        ).values('author_id'))
+    )
+
+
+def fan_out_recipe(recipe_id, author_id, pub_date):
+    """
+    Кладёт рецепт в ленты подписчиков автора, а если их слишком много —
+    помечает его для подмешивания при чтении.
+    """
+    if User.objects.filter(
+        pk=author_id,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).exists():
+        Recipe.objects.filter(pk=recipe_id).update(feed_merged=True)
+        return
+    follower_ids = list(Subscription.objects.filter(
+        author_id=author_id
+    ).values_list('follower_id', flat=True))
+    add_entries(
+        (follower_id, recipe_id, author_id, pub_date)
+        for follower_id in follower_ids
+    )
+    trim_feeds(follower_ids)
+
+
+def backfill_feed(follower_id, author_id):
+    """
+    Последние разложенные рецепты автора в ленте нового подписчика,
+    помеченные он и так увидит при чтении.
+    """
+    recipes = Recipe.objects.filter(
+        author_id=author_id, feed_merged=False
+    ).order_by('-pub_date', '-id').values_list(
+        'id', 'pub_date'
+    )[:settings.FEED_LENGTH]
+    add_entries(
+        (follower_id, recipe_id, author_id, pub_date)
+        for recipe_id, pub_date in recipes
+    )
+    trim_feeds([follower_id])
+
+
+def remove_author(follower_id, author_id):
+    FeedEntry.objects.filter(user_id=follower_id, author_id=author_id).delete()
+
+
+def add_entries(entries):
+    """
+    Записи (подписчик, рецепт, автор, дата публикации); уже лежащие в ленте
+    пропускаются.
+    """
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=recipe_id,
+                      author_id=author_id, pub_date=pub_date)
+            for user_id, recipe_id, author_id, pub_date in entries
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def trim_feeds(user_ids):
+    """
+    Оставляет в лентах пользователей FEED_LENGTH последних рецептов в
+    порядке выдачи ленты: по дате публикации, затем по id.
+    """
+    if not user_ids:
+        return
+    FeedEntry.objects.filter(id__in=FeedEntry.objects.filter(
+        user_id__in=user_ids
+    ).annotate(position=Window(
+        RowNumber(),
+        partition_by=F('user_id'),
+        order_by=(F('pub_date').desc(), F('recipe_id').desc()),
+    )).filter(position__gt=settings.FEED_LENGTH).values('id')).delete()
+
+
+def rebuild_feeds():
+    """
+    Заново помечает рецепты по текущему числу подписчиков авторов и
+    заполняет все ленты по подпискам, возвращает число записей.
+    """
+    merged = Q(author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS)
+    with transaction.atomic():
+        Recipe.objects.filter(merged).update(feed_merged=True)
+        Recipe.objects.exclude(merged).update(feed_merged=False)
+        FeedEntry.objects.all().delete()
+        for follower_id, author_id in Subscription.objects.values_list(
+            'follower_id', 'author_id'
+        ).iterator():
+            backfill_feed(follower_id, author_id)
+    return FeedEntry.objects.count()
+
+
+def fan_out_on_commit(recipe):
+    transaction.on_commit(lambda: fan_out_recipe(
+        recipe.pk, recipe.author_id, recipe.pub_date
+    ))
+
+
+def backfill_on_commit(subscription):
+    transaction.on_commit(lambda: backfill_feed(
+        subscription.follower_id, subscription.author_id
+    ))
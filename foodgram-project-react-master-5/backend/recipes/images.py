@@ -0,0 +1,119 @@
+"""
+Обработка картинок рецептов вне запроса.
+Картинка уменьшается до ImageMaxSize.IMAGE_SIZE в пуле потоков после
+фиксации транзакции; пока обработка не закончена, у рецепта статус
+pending. IMAGE_PROCESSING_SYNC выполняет обработку сразу, при сохранении.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from PIL import Image
+
+from foodgram_backend.enum import ImageMaxSize
+from recipes.variants import delete_variants
+
+logger = logging.getLogger(__name__)
+
+# Статус картинки рецепта изменился: sender — модель, recipe_id, status.
+image_processed = Signal()
+
+executor = None
+executor_lock = Lock()
+
+
+def get_executor():
+    """Пул создаётся при первой задаче, уже в процессе воркера."""
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                thread_name_prefix='recipe-image',
+            )
+    return executor
+
+
+def thumbnail(storage, name):
+    """Уменьшенная картинка в том же формате или None, если она мала."""
+    with storage.open(name) as file, Image.open(file) as picture:
+        if (
+            picture.width <= ImageMaxSize.IMAGE_SIZE.value[0]
+            and picture.height <= ImageMaxSize.IMAGE_SIZE.value[1]
+        ):
+            return None
+        image_format = picture.format
+        picture.thumbnail(ImageMaxSize.IMAGE_SIZE.value)
+        buffer = BytesIO()
+        picture.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def process_image(model, recipe_id, name):
+    """
+    Уменьшает картинку и записывает итоговый статус.
+    Уменьшенная картинка сохраняется под хэшем своего содержимого, и все
+    рецепты с исходной картинкой переходят на неё. Поэтому повторная
+    загрузка уже обработанной картинки совпадёт с ней по имени.
+    """
+    storage = model._meta.get_field('image').storage
+    status = model.ImageStatus.READY
+    processed_name = name
+    try:
+        processed = thumbnail(storage, name)
+        if processed is not None:
+            processed_name = storage.save(name, ContentFile(processed))
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+        status = model.ImageStatus.FAILED
+    recipes = model.objects.filter(image=name)
+    recipe_ids = list(recipes.values_list('id', flat=True))
+    recipes.update(
+        image=processed_name, image_status=status,
+        version=F('version') + 1,
+    )
+    for pk in recipe_ids:
+        image_processed.send(model, recipe_id=pk, status=status)
+    if processed_name != name:
+        release_image(model, name)
+    if recipe_id not in recipe_ids:
+        return None
+    return status
+
+
+def release_image(model, name):
+    """Удаляет файл и копии, если на него не ссылается ни один рецепт."""
+    if name and not model.objects.filter(image=name).exists():
+        storage = model._meta.get_field('image').storage
+        storage.delete(name)
+        delete_variants(storage, name)
+
+
+def release_image_on_commit(model, name):
+    transaction.on_commit(lambda: release_image(model, name))
+
+
+def run_in_background(model, recipe_id, name):
+    try:
+        process_image(model, recipe_id, name)
+    finally:
+        connections.close_all()
+
+
+def schedule_image_processing(recipe):
+    """Ставит обработку картинки в очередь или выполняет её сразу."""
+    args = (type(recipe), recipe.pk, recipe.image.name)
+    if settings.IMAGE_PROCESSING_SYNC:
+        recipe.image_status = process_image(*args) or recipe.image_status
+        recipe.refresh_from_db(fields=['image'])
+        recipe.loaded_image = recipe.image.name
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(run_in_background, *args)
+    )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import rebuild_similar_recipes, update_similar_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает похожих у рецептов из очереди изменений и у тех, '
+        'чьи списки это затрагивает. С --full — у всех рецептов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            total = rebuild_similar_recipes()
+        else:
+            total = update_similar_recipes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рецепты пересчитаны, рецептов: {total}.'
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import process_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает картинки рецептов, оставшиеся в статусе pending, '
+        'например после перезапуска воркеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--failed', action='store_true',
+            help='Повторить и картинки с ошибкой обработки.',
+        )
+
+    def handle(self, *args, **options):
+        statuses = [Recipe.ImageStatus.PENDING]
+        if options['failed']:
+            statuses.append(Recipe.ImageStatus.FAILED)
+        processed = 0
+        for recipe_id, name in Recipe.objects.filter(
+            image_status__in=statuses
+        ).values_list('id', 'image').iterator():
+            process_image(Recipe, recipe_id, name)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {processed}.'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from recipes.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново помечает подмешиваемые рецепты и заполняет ленты подписок '
+        'по подпискам и рецептам, например после смены FEED_LENGTH или '
+        'FEED_FANOUT_MAX_FOLLOWERS.'
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты перестроены, записей: {total}.'
+        ))
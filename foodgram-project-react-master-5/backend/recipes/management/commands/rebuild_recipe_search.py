@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from recipes.models import Recipe
+from recipes.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает таблицу полнотекстового поиска рецептов (SQLite). '
+        'На PostgreSQL вектор поиска вычисляется самой базой.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('Перестраивать нечего: вектор вычисляемый.')
+            return
+        recipes = Recipe.objects.values_list('id', 'name', 'text')
+        rebuild_search_index(recipes.iterator())
+        self.stdout.write(self.style.SUCCESS(
+            f'Поиск перестроен, рецептов: {recipes.count()}.'
+        ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.shopping_list import count_shopping_lists, refresh_shopping_lists
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сводные списки покупок по корзинам. '
+        'С --verify только сверяет их и сообщает о расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            refresh_shopping_lists()
+            self.stdout.write(self.style.SUCCESS(
+                'Списки покупок пересчитаны.'
+            ))
+            return
+        expected = count_shopping_lists()
+        stored = {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount in
+            ShoppingListItem.objects.values_list(
+                'user_id', 'ingredient_id', 'amount'
+            ).iterator()
+        }
+        wrong = {
+            key for key in expected.keys() | stored.keys()
+            if expected.get(key) != stored.get(key)
+        }
+        for user_id, ingredient_id in sorted(wrong)[:20]:
+            self.stdout.write(
+                f'пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'в таблице {stored.get((user_id, ingredient_id))}, '
+                f'по корзине {expected.get((user_id, ingredient_id))}'
+            )
+        if wrong:
+            raise CommandError(f'Расхождений: {len(wrong)}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Списки покупок сходятся, позиций: {len(stored)}.'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.counters import COUNTERS
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет денормализованные счётчики с настоящим числом строк '
+        'и исправляет расхождения. С --verify только сообщает о них.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true')
+
+    def handle(self, *args, **options):
+        total = 0
+        for counter in COUNTERS:
+            if options['verify']:
+                drifted = counter.drifted().values_list(
+                    'pk', counter.field, 'actual'
+                )
+                found = 0
+                for pk, stored, actual in drifted.iterator():
+                    if found < 20:
+                        self.stdout.write(
+                            f'{counter}, id {pk}: в поле {stored}, '
+                            f'на самом деле {actual}'
+                        )
+                    found += 1
+            else:
+                found = counter.reconcile()
+                if found:
+                    self.stdout.write(f'{counter}: исправлено {found}')
+            total += found
+        if not options['verify']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Счётчики пересчитаны, исправлено: {total}.'
+            ))
+            return
+        if total:
+            raise CommandError(f'Расхождений: {total}.')
+        self.stdout.write(self.style.SUCCESS('Счётчики сходятся.'))
@@ -4,6 +4,7 @@ from pathlib import Path
 
 from django.core.management.base import BaseCommand
 
+from api.versions import bump_version
 from recipes.models import Ingredient
 
 
@@ -24,6 +25,9 @@ class Command(BaseCommand):
             ]
 
             Ingredient.objects.bulk_create(ingredients)
+            # Дойдёт до сервера только через общий кэш, см. CACHES;
+            # выгрузка каталога и индекс поиска сверяются с самими данными.
+            bump_version('ingredients')
 
         self.stdout.write(self.style.SUCCESS(
             'Ингредиенты успешно загружены.')
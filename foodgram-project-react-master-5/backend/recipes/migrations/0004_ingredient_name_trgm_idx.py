@@ -0,0 +1,33 @@
+from django.db import migrations
+
+CREATE_INDEX = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx "
+    "ON recipes_ingredient USING gin (name gin_trgm_ops)",
+)
+DROP_INDEX = ("DROP INDEX IF EXISTS ingredient_name_trgm_idx",)
+
+
+def run_on_postgresql(statements):
+    """На остальных базах нечёткий поиск идёт по индексу в памяти."""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_recipe_pub_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_INDEX), run_on_postgresql(DROP_INDEX)
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:29
+
+from django.db import migrations, models
+import recipes.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_ingredient_name_trgm_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="version",
+            field=models.BigIntegerField(
+                db_index=True,
+                default=recipes.models.current_stamp,
+                editable=False,
+                help_text="Метка последнего изменения для выгрузки каталога",
+                verbose_name="Версия",
+            ),
+        ),
+    ]
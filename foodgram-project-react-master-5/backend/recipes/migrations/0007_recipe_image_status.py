@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_shoppinglistitem"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Обрабатывается"),
+                    ("ready", "Готова"),
+                    ("failed", "Ошибка обработки"),
+                ],
+                default="ready",
+                editable=False,
+                max_length=10,
+                verbose_name="Обработка картинки",
+            ),
+        ),
+    ]
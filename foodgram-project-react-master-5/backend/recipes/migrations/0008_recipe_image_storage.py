@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:39
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_recipe_image_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                db_index=True,
+                help_text="Необходимо загрузить картинку для рецепта",
+                storage=recipes.storage.recipe_image_storage,
+                upload_to="recipes/",
+                verbose_name="Картинка",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:47
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import foodgram_backend.counters
+
+COUNTERS = (
+    ("recipes", "Recipe", "author_id", "users", "User", "recipes_count"),
+    ("users", "Subscription", "author_id", "users", "User", "followers_count"),
+    ("recipes", "Favorite", "recipe_id", "recipes", "Recipe", "favorites_count"),
+    (
+        "recipes",
+        "ShoppingCart",
+        "recipe_id",
+        "recipes",
+        "Recipe",
+        "shopping_carts_count",
+    ),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for source_app, source, key, target_app, target, field in COUNTERS:
+        rows = (
+            apps.get_model(source_app, source)
+            .objects.filter(**{key: models.OuterRef("pk")})
+            .order_by()
+            .values(key)
+            .annotate(total=models.Count("pk"))
+            .values("total")
+        )
+        apps.get_model(target_app, target).objects.update(
+            **{field: Coalesce(models.Subquery(rows), models.Value(0))}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0008_recipe_image_storage"),
+        ("users", "0002_user_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=foodgram_backend.counters.CounterField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="shopping_carts_count",
+            field=foodgram_backend.counters.CounterField(
+                default=0, editable=False, verbose_name="В корзинах"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,179 @@
+import re
+
+from django.db import migrations
+
+# Копия таблицы и стеммера из recipes.search на момент миграции:
+# миграция не должна зависеть от того, как модуль поиска изменится потом.
+SEARCH_TABLE = "recipe_search"
+
+POSTGRESQL = (
+    "ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(text, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX recipe_search_vector_idx "
+    "ON recipes_recipe USING gin (search_vector)",
+)
+POSTGRESQL_REVERSE = (
+    "DROP INDEX IF EXISTS recipe_search_vector_idx",
+    "ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector",
+)
+
+WORD = re.compile(r"\w+")
+VOWELS = "аеиоуыэюя"
+
+PERFECTIVE_GERUND = (
+    ("в", "вши", "вшись"),
+    ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись"),
+)
+ADJECTIVE = ((), (
+    "ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем",
+    "им", "ым", "ом", "его", "ого", "ему", "ому", "их", "ых", "ую", "юю",
+    "ая", "яя", "ою", "ею",
+))
+PARTICIPLE = (("ем", "нн", "вш", "ющ", "щ"), ("ивш", "ывш", "ующ"))
+REFLEXIVE = ((), ("ся", "сь"))
+VERB = (
+    (
+        "ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но",
+        "ет", "ют", "ны", "ть", "ешь", "нно",
+    ),
+    (
+        "ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей",
+        "уй", "ил", "ыл", "им", "ым", "ен", "ило", "ыло", "ено", "ят",
+        "ует", "уют", "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю",
+    ),
+)
+NOUN = ((), (
+    "а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии",
+    "и", "ией", "ей", "ой", "ий", "й", "иям", "ям", "ием", "ем", "ам",
+    "ом", "о", "у", "ах", "иях", "ях", "ы", "ь", "ию", "ью", "ю", "ия",
+    "ья", "я",
+))
+SUPERLATIVE = ((), ("ейш", "ейше"))
+DERIVATIONAL = ((), ("ост", "ость"))
+
+
+def get_regions(word):
+    """Начала областей RV и R2 по правилам Snowball."""
+    rv = next(
+        (position + 1 for position, char in enumerate(word)
+         if char in VOWELS),
+        len(word),
+    )
+    return rv, region_after(word, region_after(word, 0))
+
+
+def region_after(word, start):
+    """Позиция после первой согласной, которая идёт за гласной."""
+    for position in range(start + 1, len(word)):
+        if word[position] not in VOWELS and word[position - 1] in VOWELS:
+            return position + 1
+    return len(word)
+
+
+def remove_ending(word, limit, endings):
+    """
+    Отрезает самое длинное окончание из группы, если оно не левее limit.
+    Окончания первой группы должны идти после «а» или «я».
+    None — окончания нет.
+    """
+    found = None
+    for group, ending in (
+        (group, ending)
+        for group, group_endings in enumerate(endings)
+        for ending in group_endings
+    ):
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= limit
+            and (found is None or len(ending) > len(found[1]))
+        ):
+            found = group, ending
+    if found is None:
+        return None
+    group, ending = found
+    stem = word[:-len(ending)]
+    if group == 0 and not (stem[-1:] in ("а", "я") and len(stem) > limit):
+        return None
+    return stem
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball."""
+    word = word.replace("ё", "е")
+    rv, r2 = get_regions(word)
+    result = remove_ending(word, rv, PERFECTIVE_GERUND)
+    if result is None:
+        word = remove_ending(word, rv, REFLEXIVE) or word
+        result = remove_ending(word, rv, ADJECTIVE)
+        if result is not None:
+            result = remove_ending(result, rv, PARTICIPLE) or result
+        else:
+            result = (
+                remove_ending(word, rv, VERB)
+                or remove_ending(word, rv, NOUN)
+            )
+    word = result or word
+    if word.endswith("и") and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = remove_ending(word, max(r2, rv), DERIVATIONAL) or word
+    superlative = remove_ending(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+    if word.endswith("нн") and len(word) - 2 >= rv:
+        word = word[:-1]
+    elif superlative is None and word.endswith("ь") and len(word) > rv:
+        word = word[:-1]
+    return word
+
+
+def stem_text(text):
+    return " ".join(
+        stem(word) for word in WORD.findall((text or "").casefold())
+    )
+
+
+def create_search(apps, schema_editor):
+    """На PostgreSQL — столбец tsvector, на SQLite — таблица FTS5."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for statement in POSTGRESQL:
+            schema_editor.execute(statement)
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(name, text)"
+        )
+        Recipe = apps.get_model("recipes", "Recipe")
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, name, text) "
+                "VALUES (%s, %s, %s)",
+                [
+                    (recipe_id, stem_text(name), stem_text(text))
+                    for recipe_id, name, text in Recipe.objects.using(
+                        schema_editor.connection.alias
+                    ).values_list("id", "name", "text").iterator()
+                ],
+            )
+
+
+def drop_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for statement in POSTGRESQL_REVERSE:
+            schema_editor.execute(statement)
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0009_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search, drop_search),
+    ]
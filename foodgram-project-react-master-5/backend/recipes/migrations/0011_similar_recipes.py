@@ -0,0 +1,94 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def queue_recipes(apps, schema_editor):
+    """Первый запуск build_similar_recipes посчитает все рецепты."""
+    Recipe = apps.get_model("recipes", "Recipe")
+    SimilarityQueue = apps.get_model("recipes", "SimilarityQueue")
+    now = timezone.now()
+    SimilarityQueue.objects.bulk_create(
+        (
+            SimilarityQueue(recipe_id=recipe_id, queued_at=now)
+            for recipe_id in Recipe.objects.values_list("id", flat=True)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0010_recipe_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarityQueue",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                ("queued_at", models.DateTimeField(verbose_name="Поставлен в очередь")),
+            ],
+            options={
+                "verbose_name": "Рецепт в очереди похожих",
+                "verbose_name_plural": "Очередь похожих рецептов",
+            },
+        ),
+        migrations.CreateModel(
+            name="SimilarRecipe",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField(verbose_name="Похожесть")),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_recipes",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipes.recipe",
+                        verbose_name="Похожий рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожий рецепт",
+                "verbose_name_plural": "Похожие рецепты",
+                "ordering": ("-score", "-similar_id"),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="similarrecipe",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "similar"), name="unique_similar_recipe"
+            ),
+        ),
+        migrations.RunPython(queue_recipes, migrations.RunPython.noop),
+    ]
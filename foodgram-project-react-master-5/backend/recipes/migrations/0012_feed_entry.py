@@ -0,0 +1,105 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_feeds(apps, schema_editor):
+    """Ленты подписчиков из последних рецептов авторов, см. recipes.feed."""
+    Subscription = apps.get_model("users", "Subscription")
+    Recipe = apps.get_model("recipes", "Recipe")
+    FeedEntry = apps.get_model("recipes", "FeedEntry")
+    author_recipes = {}
+    feeds = {}
+    for follower_id, author_id in Subscription.objects.filter(
+        author__followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).values_list("follower_id", "author_id"):
+        if author_id not in author_recipes:
+            author_recipes[author_id] = list(
+                Recipe.objects.filter(author_id=author_id)
+                .order_by("-id")
+                .values_list("id", flat=True)[: settings.FEED_LENGTH]
+            )
+        feeds.setdefault(follower_id, []).extend(
+            (recipe_id, author_id) for recipe_id in author_recipes[author_id]
+        )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=recipe_id, author_id=author_id)
+            for user_id, entries in feeds.items()
+            for recipe_id, author_id in sorted(entries, reverse=True)[
+                : settings.FEED_LENGTH
+            ]
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0011_similar_recipes"),
+        ("users", "0002_user_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Подписчик",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Запись ленты",
+                "verbose_name_plural": "Записи лент",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "author"], name="feed_entry_user_author_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="feedentry",
+            constraint=models.UniqueConstraint(
+                fields=("user", "recipe"), name="unique_feed_entry"
+            ),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_merged(apps, schema_editor):
+    """Рецепты авторов, которых 0012_feed_entry не разложила по лентам."""
+    apps.get_model("recipes", "Recipe").objects.filter(
+        author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(feed_merged=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0012_feed_entry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="feed_merged",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                help_text="Не разложен по лентам подписчиков, читается при выдаче",
+                verbose_name="Подмешивается в ленты",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                condition=models.Q(("feed_merged", True)),
+                fields=["author", "-pub_date"],
+                name="recipe_feed_merged_idx",
+            ),
+        ),
+        migrations.RunPython(mark_merged, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0013_recipe_feed_merged"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Растёт при любом изменении данных в выдаче рецепта",
+                verbose_name="Версия",
+            ),
+        ),
+    ]
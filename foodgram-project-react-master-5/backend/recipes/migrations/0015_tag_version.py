@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:41
+
+from django.db import migrations, models
+import recipes.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0014_recipe_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="version",
+            field=models.BigIntegerField(
+                default=recipes.models.current_stamp,
+                editable=False,
+                help_text="Метка последнего изменения для каталога тегов",
+                verbose_name="Версия",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:51
+
+from django.db import migrations, models
+import recipes.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0015_tag_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeletedIngredient",
+            fields=[
+                (
+                    "ingredient_id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="id ингредиента"
+                    ),
+                ),
+                (
+                    "version",
+                    models.BigIntegerField(
+                        db_index=True,
+                        default=recipes.models.current_stamp,
+                        help_text="Метка удаления для выгрузки каталога",
+                        verbose_name="Версия",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Удалённый ингредиент",
+                "verbose_name_plural": "Удалённые ингредиенты",
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+
+def fill_pub_date(apps, schema_editor):
+    """Дата публикации рецепта в уже разложенных записях лент."""
+    Recipe = apps.get_model("recipes", "Recipe")
+    apps.get_model("recipes", "FeedEntry").objects.update(
+        pub_date=models.Subquery(
+            Recipe.objects.filter(pk=models.OuterRef("recipe_id")).values(
+                "pub_date"
+            )
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0016_deleted_ingredient"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feedentry",
+            name="pub_date",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_pub_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="feedentry",
+            name="pub_date",
+            field=models.DateTimeField(
+                editable=False,
+                help_text="Дата публикации рецепта, по ней обрезается лента",
+                verbose_name="Дата публикации",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="feedentry",
+            index=models.Index(
+                fields=["user", "-pub_date", "-recipe"],
+                name="feed_entry_user_pub_date_idx",
+            ),
+        ),
+    ]
@@ -1,16 +1,26 @@
+from time import time
+
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from PIL import Image
+from django.db import models, transaction
 
-from foodgram_backend.enum import (ImageMaxSize, IngredientMaxLength,
-                                   RecipeAmount, RecipeCookingTime,
-                                   RecipeMaxLength, TagMaxLength)
+from foodgram_backend.counters import CounterField, CounterFieldsMixin
+from foodgram_backend.enum import (IngredientMaxLength, RecipeAmount,
+                                   RecipeCookingTime, RecipeMaxLength,
+                                   TagMaxLength)
+from recipes.images import (release_image_on_commit,
+                            schedule_image_processing)
+from recipes.storage import recipe_image_storage
 
 User = get_user_model()
 
 
+def current_stamp():
+    """Метка времени изменения записи в миллисекундах."""
+    return int(time() * 1000)
+
+
 class Tag(models.Model):
     """Модель для тегов."""
 
@@ -32,6 +42,12 @@ class Tag(models.Model):
         verbose_name='Слаг',
         help_text='Уникальный URL для тега',
     )
+    version = models.BigIntegerField(
+        default=current_stamp,
+        editable=False,
+        verbose_name='Версия',
+        help_text='Метка последнего изменения для каталога тегов',
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -41,6 +57,10 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.version = current_stamp()
+        super().save(*args, **kwargs)
+
 
 class Ingredient(models.Model):
     """Класс ингредиентов."""
@@ -55,6 +75,13 @@ class Ingredient(models.Model):
         verbose_name='Единица измерения',
         help_text='Необходимо указать единицу измерения',
     )
+    version = models.BigIntegerField(
+        default=current_stamp,
+        editable=False,
+        db_index=True,
+        verbose_name='Версия',
+        help_text='Метка последнего изменения для выгрузки каталога',
+    )
 
     class Meta:
         ordering = ('name',)
@@ -71,10 +98,44 @@ class Ingredient(models.Model):
     def __str__(self):
         return f'{self.name} {self.measurement_unit}'
 
+    def save(self, *args, **kwargs):
+        self.version = current_stamp()
+        super().save(*args, **kwargs)
+
+
+class DeletedIngredient(models.Model):
+    """
+    Метка удаления ингредиента: по ней выгрузка изменений каталога
+    сообщает клиенту об удалённых записях, см. api.catalog.
+    """
+
+    ingredient_id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='id ингредиента',
+    )
+    version = models.BigIntegerField(
+        default=current_stamp,
+        db_index=True,
+        verbose_name='Версия',
+        help_text='Метка удаления для выгрузки каталога',
+    )
 
-class Recipe(models.Model):
+    class Meta:
+        verbose_name = 'Удалённый ингредиент'
+        verbose_name_plural = 'Удалённые ингредиенты'
+
+    def __str__(self):
+        return f'Ингредиент {self.ingredient_id} удалён'
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель для рецептов."""
 
+    class ImageStatus(models.TextChoices):
+        PENDING = 'pending', 'Обрабатывается'
+        READY = 'ready', 'Готова'
+        FAILED = 'failed', 'Ошибка обработки'
+
     name = models.CharField(
         max_length=RecipeMaxLength.NAME.value,
         verbose_name='Название рецепта',
@@ -108,9 +169,18 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/',
+        storage=recipe_image_storage,
+        db_index=True,
         verbose_name='Картинка',
         help_text='Необходимо загрузить картинку для рецепта',
     )
+    image_status = models.CharField(
+        max_length=10,
+        choices=ImageStatus.choices,
+        default=ImageStatus.READY,
+        editable=False,
+        verbose_name='Обработка картинки',
+    )
     text = models.TextField(
         verbose_name='Описание рецепта',
         help_text='Необходимо указать описание рецепта',
@@ -120,11 +190,44 @@ class Recipe(models.Model):
         verbose_name='Время приготовления в минутах',
         help_text='Необходимо указать время приготовления в минутах',
     )
+    favorites_count = CounterField(verbose_name='В избранном')
+    shopping_carts_count = CounterField(verbose_name='В корзинах')
+    feed_merged = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Подмешивается в ленты',
+        help_text='Не разложен по лентам подписчиков, читается при выдаче',
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия',
+        help_text='Растёт при любом изменении данных в выдаче рецепта',
+    )
+
+    # Пометку ставит раскладка по лентам (recipes.feed), картинку и её
+    # статус — обработка в фоне (recipes.images), а новую картинку
+    # записывает save отдельным UPDATE. Версию увеличивают только
+    # UPDATE с F(), иначе устаревший объект вернул бы её назад.
+    separately_updated_fields = (
+        'feed_merged', 'image', 'image_status', 'version',
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_feed_merged_idx',
+                condition=models.Q(feed_merged=True),
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['name', 'author'],
@@ -142,11 +245,48 @@ class Recipe(models.Model):
         self.name = self.name.capitalize()
         return super().clean()
 
+    loaded_image = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_image = instance.__dict__.get('image')
+        return instance
+
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        pic = Image.open(self.image.path)
-        pic.thumbnail(ImageMaxSize.IMAGE_SIZE.value)
-        pic.save(self.image.path)
+        """
+        Картинка обрабатывается, только если её содержимое изменилось.
+        Файл сохраняется заранее, чтобы сравнить имена по хэшу содержимого;
+        уже обработанная картинка другого рецепта переиспользуется.
+        Картинка и статус пишутся только вместе с новой картинкой, иначе
+        сохранение затёрло бы результат фоновой обработки.
+        """
+        image_changed = False
+        if 'image' not in self.get_deferred_fields():
+            if self.image and not self.image._committed:
+                self.image.save(self.image.name, self.image.file, save=False)
+            image_changed = self.image.name != self.loaded_image
+        schedule = False
+        if image_changed:
+            shared_status = Recipe.objects.filter(
+                image=self.image.name
+            ).exclude(pk=self.pk).values_list('image_status', flat=True)
+            self.image_status = self.ImageStatus.PENDING
+            if self.ImageStatus.READY in shared_status:
+                self.image_status = self.ImageStatus.READY
+            schedule = self.image_status == self.ImageStatus.PENDING
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if image_changed and not adding:
+                Recipe.objects.filter(pk=self.pk).update(
+                    image=self.image.name, image_status=self.image_status
+                )
+        if image_changed:
+            release_image_on_commit(Recipe, self.loaded_image)
+            self.loaded_image = self.image.name
+        if schedule:
+            schedule_image_processing(self)
 
 
 class RecipeTags(models.Model):
@@ -260,3 +400,143 @@ class ShoppingCart(UserRecipeBase):
             f'Пользователь {self.user} '
             f'добавил рецепт {self.recipe} в корзину'
         )
+
+
+class ShoppingListItem(models.Model):
+    """
+    Сумма ингредиента по всем рецептам в корзине пользователя.
+    Поддерживается сигналами при изменении корзины и ингредиентов рецептов.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+        default_related_name = 'shopping_list_items'
+
+    def __str__(self):
+        return f'{self.ingredient} - {self.amount} у {self.user}'
+
+
+class SimilarRecipe(models.Model):
+    """
+    Рецепт, близкий к данному по составу ингредиентов.
+    Таблицу заполняет команда build_similar_recipes, см. recipes.similarity.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField(verbose_name='Похожесть')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('-score', '-similar_id')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.similar} похож на {self.recipe} на {self.score:.2f}'
+
+
+class SimilarityQueue(models.Model):
+    """Рецепты, чьих похожих нужно пересчитать при следующем запуске."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Рецепт',
+    )
+    queued_at = models.DateTimeField(verbose_name='Поставлен в очередь')
+
+    class Meta:
+        verbose_name = 'Рецепт в очереди похожих'
+        verbose_name_plural = 'Очередь похожих рецептов'
+
+    def __str__(self):
+        return f'{self.recipe} с {self.queued_at}'
+
+
+class FeedEntry(models.Model):
+    """Рецепт автора в ленте подписчика, см. recipes.feed."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField(
+        editable=False,
+        verbose_name='Дата публикации',
+        help_text='Дата публикации рецепта, по ней обрезается лента',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_entry_user_author_idx',
+            ),
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_entry_user_pub_date_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
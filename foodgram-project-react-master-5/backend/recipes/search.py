@@ -0,0 +1,219 @@
+"""
+Полнотекстовый поиск рецептов по названию и описанию.
+PostgreSQL: вычисляемый столбец search_vector (tsvector со словарём
+russian, название с весом A, описание — B) и GIN-индекс по нему.
+SQLite: таблица FTS5 recipe_search с основами слов, которые даёт
+стеммер Snowball для русского языка ниже; она обновляется сигналами
+при записи рецептов. На остальных СУБД — поиск всех слов через icontains.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'recipe_search'
+# Веса названия и описания в bm25 и ts_rank_cd.
+NAME_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+WORD = re.compile(r'\w+')
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (('ем', 'нн', 'вш', 'ющ', 'щ'), ('ивш', 'ывш', 'ующ'))
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+SUPERLATIVE = ((), ('ейш', 'ейше'))
+DERIVATIONAL = ((), ('ост', 'ость'))
+
+
+def get_regions(word):
+    """Начала областей RV и R2 по правилам Snowball."""
+    rv = next(
+        (position + 1 for position, char in enumerate(word)
+         if char in VOWELS),
+        len(word),
+    )
+    return rv, region_after(word, region_after(word, 0))
+
+
+def region_after(word, start):
+    """Позиция после первой согласной, которая идёт за гласной."""
+    for position in range(start + 1, len(word)):
+        if word[position] not in VOWELS and word[position - 1] in VOWELS:
+            return position + 1
+    return len(word)
+
+
+def remove_ending(word, limit, endings):
+    """
+    Отрезает самое длинное окончание из группы, если оно не левее limit.
+    Окончания первой группы должны идти после «а» или «я».
+    None — окончания нет.
+    """
+    found = None
+    for group, ending in (
+        (group, ending)
+        for group, group_endings in enumerate(endings)
+        for ending in group_endings
+    ):
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= limit
+            and (found is None or len(ending) > len(found[1]))
+        ):
+            found = group, ending
+    if found is None:
+        return None
+    group, ending = found
+    stem = word[:-len(ending)]
+    if group == 0 and not (stem[-1:] in ('а', 'я') and len(stem) > limit):
+        return None
+    return stem
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball."""
+    word = word.replace('ё', 'е')
+    rv, r2 = get_regions(word)
+    result = remove_ending(word, rv, PERFECTIVE_GERUND)
+    if result is None:
+        word = remove_ending(word, rv, REFLEXIVE) or word
+        result = remove_ending(word, rv, ADJECTIVE)
+        if result is not None:
+            result = remove_ending(result, rv, PARTICIPLE) or result
+        else:
+            result = (
+                remove_ending(word, rv, VERB)
+                or remove_ending(word, rv, NOUN)
+            )
+    word = result or word
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = remove_ending(word, max(r2, rv), DERIVATIONAL) or word
+    superlative = remove_ending(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        word = word[:-1]
+    elif superlative is None and word.endswith('ь') and len(word) > rv:
+        word = word[:-1]
+    return word
+
+
+def stem_words(text):
+    return [stem(word) for word in WORD.findall((text or '').casefold())]
+
+
+def stem_text(text):
+    return ' '.join(stem_words(text))
+
+
+def get_connection(using=None):
+    return connections[using or DEFAULT_DB_ALIAS]
+
+
+def index_recipe(recipe_id, name, text, using=None):
+    """Запись рецепта в таблицу FTS5, только для SQLite."""
+    with get_connection(using).cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [recipe_id]
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, text) '
+            'VALUES (%s, %s, %s)',
+            [recipe_id, stem_text(name), stem_text(text)],
+        )
+
+
+def unindex_recipe(recipe_id, using=None):
+    with get_connection(using).cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [recipe_id]
+        )
+
+
+def rebuild_search_index(recipes, using=None):
+    """
+    Заново заполняет таблицу FTS5 строками (id, название, описание),
+    например после массовых обновлений через QuerySet.update.
+    """
+    with get_connection(using).cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, text) '
+            'VALUES (%s, %s, %s)',
+            [
+                (recipe_id, stem_text(name), stem_text(text))
+                for recipe_id, name, text in recipes
+            ],
+        )
+
+
+def search_recipes(queryset, query):
+    """
+    Рецепты, где есть все слова запроса, с аннотацией search_rank
+    (больше — релевантнее) и сортировкой по ней, затем по новизне.
+    Фильтр и ранг — часть того же SQL-запроса, поэтому остальные
+    фильтры и пагинация применяются в БД.
+    """
+    words = WORD.findall(query.casefold())
+    if not words:
+        return queryset
+    vendor = get_connection(queryset.db).vendor
+    table = queryset.model._meta.db_table
+    if vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('russian', %s)"
+        queryset = queryset.filter(RawSQL(
+            f'{table}.search_vector @@ {tsquery}', [query],
+            output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f"ts_rank_cd('{{0, 0, {TEXT_WEIGHT / NAME_WEIGHT}, 1}}', "
+            f'{table}.search_vector, {tsquery})',
+            [query], output_field=FloatField(),
+        ))
+    elif vendor == 'sqlite':
+        match = ' '.join(f'"{stem(word)}"' for word in words)
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            [match],
+        )).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({SEARCH_TABLE}, {NAME_WEIGHT}, {TEXT_WEIGHT}) '
+            f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND rowid = {table}.id',
+            [match], output_field=FloatField(),
+        ))
+    else:
+        for word in words:
+            queryset = queryset.filter(
+                Q(name__icontains=word) | Q(text__icontains=word)
+            )
+        queryset = queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+    return queryset.order_by('-search_rank', '-pub_date', '-id')
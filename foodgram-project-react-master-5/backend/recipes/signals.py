@@ -0,0 +1,136 @@
+from django.db import connections, transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from recipes.counters import COUNTERS
+from recipes.feed import backfill_on_commit, fan_out_on_commit, remove_author
+from recipes.images import release_image_on_commit
+from recipes.models import (DeletedIngredient, Ingredient, Recipe, Recipebook,
+                            SimilarityQueue, SimilarRecipe)
+from recipes.search import index_recipe, unindex_recipe
+from users.models import Subscription
+
+
+@receiver(post_delete, sender=Recipe, dispatch_uid='recipes:release-image')
+def release_recipe_image(sender, instance, **kwargs):
+    """Файл картинки удаляется вместе с последним ссылающимся рецептом."""
+    release_image_on_commit(sender, instance.image.name)
+
+
+@receiver(
+    post_delete, sender=Ingredient, dispatch_uid='ingredients:tombstone'
+)
+def record_deleted_ingredient(sender, instance, **kwargs):
+    """Метка удаления для выгрузки изменений каталога ингредиентов."""
+    DeletedIngredient.objects.bulk_create(
+        [DeletedIngredient(ingredient_id=instance.pk)],
+        update_conflicts=True,
+        unique_fields=['ingredient_id'],
+        update_fields=['version'],
+    )
+
+
+@receiver(post_save, sender=Recipe, dispatch_uid='recipes:index-search')
+def index_recipe_search(sender, instance, using, **kwargs):
+    """Таблица FTS5 есть только на SQLite, на PostgreSQL вектор вычисляемый."""
+    if connections[using].vendor == 'sqlite':
+        index_recipe(instance.pk, instance.name, instance.text, using)
+
+
+@receiver(post_delete, sender=Recipe, dispatch_uid='recipes:unindex-search')
+def unindex_recipe_search(sender, instance, using, **kwargs):
+    if connections[using].vendor == 'sqlite':
+        unindex_recipe(instance.pk, using)
+
+
+def queue_similar_recipes(recipe_ids):
+    """
+    Ставит рецепты в очередь пересчёта похожих после фиксации транзакции.
+    Удалённые к этому времени рецепты пропускаются.
+    """
+    def queue():
+        now = timezone.now()
+        SimilarityQueue.objects.bulk_create(
+            [
+                SimilarityQueue(recipe_id=recipe_id, queued_at=now)
+                for recipe_id in Recipe.objects.filter(
+                    pk__in=recipe_ids
+                ).values_list('pk', flat=True)
+            ],
+            update_conflicts=True,
+            unique_fields=['recipe'],
+            update_fields=['queued_at'],
+        )
+    transaction.on_commit(queue)
+
+
+@receiver(post_save, sender=Recipe, dispatch_uid='similar-recipes:recipe')
+def queue_new_recipe(sender, instance, created, **kwargs):
+    if created:
+        queue_similar_recipes([instance.pk])
+
+
+@receiver(
+    pre_delete, sender=Recipe, dispatch_uid='similar-recipes:recipe-delete'
+)
+def queue_recipes_similar_to_deleted(sender, instance, **kwargs):
+    """Списки, где был удаляемый рецепт, надо дополнить."""
+    recipe_ids = list(SimilarRecipe.objects.filter(
+        similar=instance
+    ).values_list('recipe_id', flat=True))
+    if recipe_ids:
+        queue_similar_recipes(recipe_ids)
+
+
+@receiver(post_save, sender=Recipebook, dispatch_uid='similar-recipes:save')
+@receiver(
+    post_delete, sender=Recipebook, dispatch_uid='similar-recipes:delete'
+)
+def queue_recipe_with_changed_ingredients(sender, instance, **kwargs):
+    queue_similar_recipes([instance.recipe_id])
+
+
+@receiver(
+    m2m_changed, sender=Recipe.ingredients.through,
+    dispatch_uid='similar-recipes:m2m',
+)
+def queue_recipes_on_m2m(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """
+    Ингредиенты изменены через менеджер m2m. При очистке со стороны
+    ингредиента рецепты известны только до неё.
+    """
+    if reverse and action == 'pre_clear':
+        queue_similar_recipes(list(
+            instance.recipes.values_list('pk', flat=True)
+        ))
+    elif action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    elif not reverse:
+        queue_similar_recipes([instance.pk])
+    elif pk_set:
+        queue_similar_recipes(pk_set)
+
+
+@receiver(post_save, sender=Recipe, dispatch_uid='feed:recipe')
+def fan_out_new_recipe(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        fan_out_on_commit(instance)
+
+
+@receiver(post_save, sender=Subscription, dispatch_uid='feed:subscribe')
+def backfill_new_subscription(sender, instance, created, raw=False,
+                              **kwargs):
+    if created and not raw:
+        backfill_on_commit(instance)
+
+
+@receiver(post_delete, sender=Subscription, dispatch_uid='feed:unsubscribe')
+def remove_unsubscribed_author(sender, instance, **kwargs):
+    remove_author(instance.follower_id, instance.author_id)
+
+
+for counter in COUNTERS:
+    counter.connect()
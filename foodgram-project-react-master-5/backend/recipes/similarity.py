@@ -0,0 +1,184 @@
+"""
+Похожие рецепты по составу ингредиентов.
+Рецепты — строки разреженной матрицы рецепт × ингредиент из Recipebook,
+похожесть — косинусная мера: число общих ингредиентов, делённое на
+корень из произведения числа ингредиентов двух рецептов. Строки
+умножаются на всю матрицу блоками, поэтому память зависит от размера
+блока, а не от квадрата числа рецептов. Для каждого рецепта в
+SimilarRecipe хранится SIMILAR_RECIPES_COUNT ближайших.
+Модуль нужен только команде build_similar_recipes.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from scipy import sparse
+
+from recipes.models import Recipe, Recipebook, SimilarityQueue, SimilarRecipe
+
+# Знаков после запятой у похожести: равные по смыслу значения не
+# различаются ошибкой округления, и порядок при равенстве — по id.
+SCORE_DIGITS = 5
+
+
+class RecipeMatrix:
+    """Матрица рецепт × ингредиент со строками единичной длины."""
+
+    def __init__(self, pairs):
+        """pairs — пары (id рецепта, id ингредиента) без повторов."""
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        self.recipe_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+        ingredient_ids, columns = np.unique(
+            pairs[:, 1], return_inverse=True
+        )
+        matrix = sparse.csr_matrix(
+            (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+            shape=(len(self.recipe_ids), len(ingredient_ids)),
+        )
+        sizes = np.diff(matrix.indptr).astype(np.float32)
+        matrix.data /= np.repeat(np.sqrt(sizes), np.diff(matrix.indptr))
+        self.matrix = matrix
+        self.transposed = matrix.T.tocsr()
+
+    @classmethod
+    def from_db(cls):
+        return cls(list(
+            Recipebook.objects.values_list(
+                'recipe_id', 'ingredient_id'
+            ).order_by().iterator()
+        ))
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def locate(self, recipe_ids):
+        """Номера строк рецептов и маска тех, что есть в матрице."""
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        positions = np.searchsorted(self.recipe_ids, recipe_ids)
+        found = positions < len(self)
+        found[found] = self.recipe_ids[positions[found]] == recipe_ids[found]
+        return positions, found
+
+    def positions(self, recipe_ids):
+        """Номера строк по порядку; рецептов без ингредиентов в матрице нет."""
+        positions, found = self.locate(list(recipe_ids))
+        return np.sort(positions[found])
+
+    def similarities(self, positions):
+        """Блок похожестей строк positions на все рецепты."""
+        block = (self.matrix[positions] @ self.transposed).tocsr()
+        np.round(block.data, SCORE_DIGITS, out=block.data)
+        return block
+
+    def neighbours(self, positions, count):
+        """
+        Для каждой строки — пара (id рецепта, [(id похожего, похожесть)])
+        с count ближайшими по убыванию похожести, затем новизны.
+        """
+        block = self.similarities(positions)
+        for row, position in enumerate(positions):
+            start, end = block.indptr[row], block.indptr[row + 1]
+            columns = block.indices[start:end]
+            scores = block.data[start:end]
+            other = columns != position
+            columns, scores = columns[other], scores[other]
+            if len(scores) > count:
+                cutoff = np.partition(scores, len(scores) - count)[
+                    len(scores) - count
+                ]
+                best = scores >= cutoff
+                columns, scores = columns[best], scores[best]
+            order = np.lexsort((-self.recipe_ids[columns], -scores))[:count]
+            yield int(self.recipe_ids[position]), list(zip(
+                self.recipe_ids[columns[order]].tolist(),
+                scores[order].astype(float).round(SCORE_DIGITS).tolist(),
+            ))
+
+
+def store(neighbours):
+    """Заменяет похожих у рецептов одного блока."""
+    neighbours = dict(neighbours)
+    recipe_ids = set(neighbours).union(*(
+        (similar_id for similar_id, _ in similar)
+        for similar in neighbours.values()
+    ))
+    with transaction.atomic():
+        existing = set(Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list('id', flat=True))
+        SimilarRecipe.objects.filter(recipe_id__in=neighbours).delete()
+        SimilarRecipe.objects.bulk_create(
+            SimilarRecipe(recipe_id=recipe_id, similar_id=similar_id,
+                          score=score)
+            for recipe_id, similar in neighbours.items()
+            if recipe_id in existing
+            for similar_id, score in similar
+            if similar_id in existing
+        )
+
+
+def store_blocks(matrix, positions, missing=()):
+    """
+    Пересчитывает строки positions блоками по SIMILAR_RECIPES_BLOCK_SIZE,
+    у рецептов missing без ингредиентов похожих больше нет.
+    """
+    size = settings.SIMILAR_RECIPES_BLOCK_SIZE
+    for start in range(0, len(positions), size):
+        store(matrix.neighbours(
+            positions[start:start + size], settings.SIMILAR_RECIPES_COUNT
+        ))
+    store((recipe_id, []) for recipe_id in missing)
+
+
+def rebuild_similar_recipes():
+    """Пересчитывает похожих у всех рецептов, возвращает их число."""
+    started = timezone.now()
+    matrix = RecipeMatrix.from_db()
+    store_blocks(matrix, np.arange(len(matrix)))
+    SimilarRecipe.objects.exclude(
+        recipe_id__in=Recipebook.objects.values('recipe_id')
+    ).delete()
+    SimilarityQueue.objects.filter(queued_at__lte=started).delete()
+    return len(matrix)
+
+
+def update_similar_recipes():
+    """
+    Пересчитывает рецепты из очереди, а также те, у кого они уже есть
+    среди похожих или теперь похожи сильнее, чем последний из их списка.
+    Возвращает число пересчитанных рецептов.
+    """
+    started = timezone.now()
+    queue = SimilarityQueue.objects.filter(queued_at__lte=started)
+    queued = set(queue.values_list('recipe_id', flat=True))
+    if not queued:
+        return 0
+    matrix = RecipeMatrix.from_db()
+    best = np.zeros(len(matrix), dtype=np.float32)
+    positions = matrix.positions(queued)
+    size = settings.SIMILAR_RECIPES_BLOCK_SIZE
+    for start in range(0, len(positions), size):
+        block = matrix.similarities(positions[start:start + size])
+        best = np.maximum(best, block.max(axis=0).toarray().ravel())
+    full = np.array(list(SimilarRecipe.objects.values('recipe_id').annotate(
+        total=Count('id'), lowest=Min('score')
+    ).filter(
+        total__gte=settings.SIMILAR_RECIPES_COUNT
+    ).values_list('recipe_id', 'lowest').order_by()), dtype=np.float64)
+    full = full.reshape(-1, 2)
+    rows, found = matrix.locate(full[:, 0])
+    lowest = np.zeros(len(matrix), dtype=np.float32)
+    lowest[rows[found]] = full[found, 1]
+    affected = queued.union(
+        matrix.recipe_ids[(best > 0) & (best >= lowest)].tolist(),
+        SimilarRecipe.objects.filter(
+            similar_id__in=queue.values('recipe_id')
+        ).values_list('recipe_id', flat=True),
+    )
+    store_blocks(
+        matrix, matrix.positions(affected),
+        affected.difference(matrix.recipe_ids.tolist()),
+    )
+    queue.delete()
+    return len(affected)
@@ -0,0 +1,38 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файлы называются по sha256 содержимого в каталоге upload_to.
+    Одинаковое содержимое хранится один раз: если такой файл уже есть,
+    save возвращает его имя и ничего не пишет. Удалять файл можно, только
+    когда на него не ссылается ни одна запись, см. recipes.images.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(
+            os.path.dirname(name), digest.hexdigest() + extension
+        )
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def save_as(self, name, content, max_length=None):
+        """Обычное сохранение под заданным именем, без хэша."""
+        return super().save(name, content, max_length)
+
+
+def recipe_image_storage():
+    return ContentAddressedStorage()
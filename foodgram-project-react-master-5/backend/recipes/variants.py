@@ -0,0 +1,94 @@
+"""
+Уменьшенные копии картинок рецептов для адаптивной выдачи.
+Картинка хранится под хэшем содержимого, поэтому имя копии зависит
+только от исходного файла: recipes/variants/<хэш>/<ширина>.<формат>.
+Адреса копий строятся без запросов к БД и диску, а сами файлы создаются
+при первом обращении к адресу и дальше отдаются как обычные media.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+
+VARIANTS_DIR = 'variants'
+# Расширение в имени файла: формат Pillow и параметры сохранения.
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def get_variants_dir(name):
+    """Каталог копий картинки name."""
+    directory, filename = os.path.split(name)
+    digest = os.path.splitext(filename)[0]
+    return os.path.join(directory, VARIANTS_DIR, digest)
+
+
+def get_variant_name(name, width, extension):
+    return os.path.join(get_variants_dir(name), f'{width}.{extension}')
+
+
+def get_variant_names(name):
+    """Имена всех копий: {расширение: {ширина: имя}}."""
+    return {
+        extension: {
+            width: get_variant_name(name, width, extension)
+            for width in settings.RECIPE_IMAGE_VARIANT_WIDTHS
+        }
+        for extension in VARIANT_FORMATS
+    }
+
+
+def render_variant(storage, name, width, extension):
+    """Копия шириной не больше width; картинка не увеличивается."""
+    image_format, options = VARIANT_FORMATS[extension]
+    with storage.open(name) as file, Image.open(file) as picture:
+        picture.thumbnail((width, width * picture.height // picture.width))
+        if image_format == 'JPEG' and picture.mode != 'RGB':
+            picture = flatten(picture)
+        elif picture.mode not in ('RGB', 'RGBA'):
+            picture = picture.convert('RGBA')
+        buffer = BytesIO()
+        picture.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def flatten(picture):
+    """Прозрачность на белом фоне: в JPEG нет альфа-канала."""
+    picture = picture.convert('RGBA')
+    background = Image.new('RGB', picture.size, 'white')
+    background.paste(picture, mask=picture.getchannel('A'))
+    return background
+
+
+def get_variant(storage, name, width, extension):
+    """
+    Имя файла копии; при первом обращении копия создаётся.
+    Если копию параллельно записал другой запрос, хранилище сохранит
+    файл под другим именем — такой дубль сразу удаляется.
+    """
+    variant = get_variant_name(name, width, extension)
+    if storage.exists(variant):
+        return variant
+    content = render_variant(storage, name, width, extension)
+    saved = storage.save_as(variant, ContentFile(content))
+    if saved != variant:
+        storage.delete(saved)
+    return variant
+
+
+def delete_variants(storage, name):
+    directory = get_variants_dir(name)
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        storage.delete(os.path.join(directory, filename))
+    try:
+        os.rmdir(storage.path(directory))
+    except OSError:
+        pass
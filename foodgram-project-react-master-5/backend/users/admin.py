@@ -16,6 +16,8 @@ class UserAdmin(auth_admin.UserAdmin):
         'email',
         'first_name',
         'last_name',
+        'recipes_count',
+        'followers_count',
         'is_user_subscribed',
     ]
 
@@ -27,16 +29,19 @@ class UserAdmin(auth_admin.UserAdmin):
     ]
 
     list_filter = [
-        'username',
-        'email',
+        'is_staff',
+        'is_active',
     ]
 
     empty_value_display = '-пусто-'
 
-    
-    @admin.display(description='Подписан')
+    show_full_result_count = False
+
+    @admin.display(
+        description='Подписан', boolean=True, ordering='followers_count'
+    )
     def is_user_subscribed(self, obj):
-        return Subscription.objects.filter(author=obj).exists()
+        return obj.followers_count > 0
 
 
 @admin.register(Subscription)
@@ -48,7 +53,15 @@ class SubscribeAdmin(admin.ModelAdmin):
         'author',
     ]
 
+    list_select_related = ('follower', 'author')
+
     search_fields = [
-        'follower',
-        'author',
+        'follower__username',
+        'follower__email',
+        'author__username',
+        'author__email',
     ]
+
+    autocomplete_fields = ('follower', 'author')
+
+    show_full_result_count = False
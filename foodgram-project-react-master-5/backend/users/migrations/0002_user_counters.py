@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:47
+
+from django.db import migrations
+import foodgram_backend.counters
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=foodgram_backend.counters.CounterField(
+                default=0, editable=False, verbose_name="Число подписчиков"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="recipes_count",
+            field=foodgram_backend.counters.CounterField(
+                default=0, editable=False, verbose_name="Число рецептов"
+            ),
+        ),
+    ]
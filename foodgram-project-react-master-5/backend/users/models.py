@@ -2,10 +2,11 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
 
+from foodgram_backend.counters import CounterField, CounterFieldsMixin
 from foodgram_backend.enum import UserMaxLength
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """Класс пользователей."""
     
     username = models.CharField(
@@ -27,6 +28,8 @@ class User(AbstractUser):
         unique=True,
         max_length=UserMaxLength.EMAIL.value,
     )
+    recipes_count = CounterField(verbose_name='Число рецептов')
+    followers_count = CounterField(verbose_name='Число подписчиков')
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')